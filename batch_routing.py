@@ -0,0 +1,113 @@
+"""
+Batch Routing - Classify large message sets by safety zone and scenario without running turns
+Read-only: no session state, history, audit events or OpenAI calls. Big batches are split into
+chunks and classified on a process pool; each chunk is one safety regex pass plus scenario lookups
+"""
+
+import os
+
+from safety_engine import SAFETY_ENGINE
+
+DEFAULT_CHUNK_SIZE = 500
+
+COLUMNS = ("zone", "matched_keyword", "scenario", "similarity", "matcher", "route")
+
+
+class BatchClassification:
+    """
+    Columnar result: one list per column, row i belongs to messages[i].
+
+    zone            - 'red', 'amber' or 'green'
+    matched_keyword - first lexicon phrase of that zone in the message (None when green)
+    scenario        - matching scenario key, or None
+    similarity      - fuzzy ratio or semantic cosine of that scenario (0.0 without one)
+    matcher         - 'fuzzy', 'semantic' or None
+    route           - what get_response would do in a fresh session: 'red', 'amber', 'scenario' or 'creative'
+    """
+    __slots__ = COLUMNS
+
+    def __init__(self, **columns):
+        for name in COLUMNS:
+            setattr(self, name, columns.get(name, []))
+
+    def __len__(self):
+        return len(self.zone)
+
+    def __getitem__(self, i: int) -> dict:
+        return {name: getattr(self, name)[i] for name in COLUMNS}
+
+    def columns(self) -> dict:
+        return {name: getattr(self, name) for name in COLUMNS}
+
+    def extend(self, other: "BatchClassification"):
+        for name in COLUMNS:
+            getattr(self, name).extend(getattr(other, name))
+
+    def __repr__(self):
+        return f"BatchClassification({len(self)} messages)"
+
+
+def classify_chunk(messages: list, scenario_index, semantic_router=None) -> BatchClassification:
+    """Classify messages in this process (routing order: fuzzy index, then the semantic router)"""
+    result = BatchClassification()
+    for scan in SAFETY_ENGINE.scan_batch(messages):
+        result.zone.append(scan.zone)
+        result.matched_keyword.append(
+            next((match.phrase for match in scan.matches if match.zone == scan.zone), None))
+
+    missed = []
+    for i, message in enumerate(messages):
+        scenario_key, similarity = scenario_index.match(message)
+        result.scenario.append(scenario_key)
+        result.similarity.append(similarity)
+        result.matcher.append("fuzzy" if scenario_key is not None else None)
+        if scenario_key is None:
+            missed.append(i)
+
+    if semantic_router is not None and missed:
+        for i, (scenario_key, similarity) in zip(missed, semantic_router.match_batch([messages[i] for i in missed])):
+            if scenario_key is not None:
+                result.scenario[i], result.similarity[i], result.matcher[i] = scenario_key, similarity, "semantic"
+    return result
+
+
+# ===== PROCESS POOL =====
+_worker_index = None
+_worker_router = None
+
+
+def _init_worker(scenario_index, semantic_router):
+    global _worker_index, _worker_router
+    _worker_index, _worker_router = scenario_index, semantic_router
+
+
+def _classify_in_worker(messages: list) -> BatchClassification:
+    return classify_chunk(messages, _worker_index, _worker_router)
+
+
+def classify_messages(messages: list, scenario_index, semantic_router=None, workers: int = None,
+                      chunk_size: int = DEFAULT_CHUNK_SIZE) -> BatchClassification:
+    """
+    Classify `messages` (route column left empty; see BaseCoach.classify_batch).
+    Batches larger than one chunk use `workers` processes (default: every core);
+    the index and router are sent to each worker once.
+    """
+    messages = list(messages)
+    workers = workers or os.cpu_count() or 1
+    chunks = [messages[i:i + chunk_size] for i in range(0, len(messages), chunk_size)]
+    if workers < 2 or len(chunks) < 2:
+        result = BatchClassification()
+        for chunk in chunks:
+            result.extend(classify_chunk(chunk, scenario_index, semantic_router))
+        return result
+
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing import get_context
+
+    # spawn: safe to call from threaded hosts (Streamlit, coach_server workers)
+    with ProcessPoolExecutor(min(workers, len(chunks)), mp_context=get_context("spawn"),
+                             initializer=_init_worker, initargs=(scenario_index, semantic_router)) as pool:
+        result = BatchClassification()
+        for chunk_result in pool.map(_classify_in_worker, chunks):
+            result.extend(chunk_result)
+        return result
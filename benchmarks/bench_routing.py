@@ -0,0 +1,128 @@
+"""
+Benchmark - get_response routing hot path (safety scan, scenario matching, history) with a stub LLM
+Replays a synthetic session corpus through AnneRosental/HiroLin at several concurrency levels and
+reports p50/p95/p99 per route, per-stage latency, throughput and memory growth over a long session
+Run from the repository root:  python -m benchmarks.bench_routing
+"""
+
+import argparse
+import logging
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.routing_corpus import generate_sessions, load_sessions, save_sessions
+from benchmarks.stub_openai import StubOpenAI
+from turn_metrics import LatencyHistogram
+
+ROUTES = ("red", "amber", "scenario", "creative", "fallback")
+HOT_STAGES = ("safety", "scenario", "prompt")
+
+
+def make_coach(coach_key: str, stub: StubOpenAI):
+    from Anne_Rosental import AnneRosental
+    from Hiro_Lin import HiroLin
+    from conversation_database import SCENARIO_RESPONSES
+
+    coach_class = AnneRosental if coach_key == "anne" else HiroLin
+    coach = coach_class(coach_class.persona.system_prompt, SCENARIO_RESPONSES)
+    coach.client = stub
+    return coach
+
+
+def replay_session(session: dict, stub: StubOpenAI) -> list:
+    """Run one session; returns [(route, turn seconds, stage_timings)]"""
+    coach = make_coach(session["coach"], stub)
+    results = []
+    for message in session["messages"]:
+        start = time.perf_counter()
+        coach.get_response(message)
+        results.append((coach.last_route, time.perf_counter() - start, coach.stage_timings))
+    return results
+
+
+def run_level(sessions: list, concurrency: int, stub: StubOpenAI) -> tuple:
+    """Replay every session with `concurrency` worker threads; returns (turns/s, route and stage histograms)"""
+    routes = {route: LatencyHistogram() for route in ROUTES}
+    stages = {stage: LatencyHistogram() for stage in HOT_STAGES}
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        per_session = list(pool.map(lambda session: replay_session(session, stub), sessions))
+    elapsed = time.perf_counter() - start
+
+    turns = 0
+    for results in per_session:
+        for route, seconds, timings in results:
+            turns += 1
+            routes[route].record(seconds)
+            for stage in HOT_STAGES:
+                if stage in timings:
+                    stages[stage].record(timings[stage])
+    return turns / elapsed, routes, stages
+
+
+def memory_growth(turns: int, stub: StubOpenAI, checkpoints: int = 5) -> list:
+    """Traced memory (bytes) after every turns/checkpoints turns of one long session"""
+    session = generate_sessions(1, turns, seed=11, mix={"red": 0.0, "amber": 0.02, "scenario": 0.25})[0]
+    coach = make_coach(session["coach"], stub)
+    step = max(turns // checkpoints, 1)
+    samples = []
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    for i, message in enumerate(session["messages"], 1):
+        coach.get_response(message)
+        if i % step == 0:
+            samples.append((i, tracemalloc.get_traced_memory()[0] - baseline, len(coach.context)))
+    tracemalloc.stop()
+    return samples
+
+
+def ms(seconds: float) -> str:
+    return f"{seconds * 1000:9.3f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=12, help="max user messages per session")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--corpus", help="replay sessions from this JSONL file instead of generating them")
+    parser.add_argument("--write-corpus", help="save the generated sessions to this JSONL file")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--latency", type=float, default=0.05, help="stub LLM time to first token (s)")
+    parser.add_argument("--token-rate", type=float, default=0.0, help="stub LLM tokens/s (0 = instant)")
+    parser.add_argument("--long-session", type=int, default=2000, help="turns for the memory run (0 = skip)")
+    args = parser.parse_args()
+
+    # Without SAFETY_AUDIT_* set, safety events go to the console logger; keep the report readable
+    logging.getLogger("coach.safety").setLevel(logging.CRITICAL + 1)
+    sessions = load_sessions(args.corpus) if args.corpus else generate_sessions(args.sessions, args.turns, args.seed)
+    if args.write_corpus:
+        save_sessions(sessions, args.write_corpus)
+    stub = StubOpenAI(latency=args.latency, token_rate=args.token_rate)
+
+    print(f"{len(sessions)} sessions, {sum(len(s['messages']) for s in sessions)} turns, "
+          f"stub latency {args.latency * 1000:.0f} ms, token rate {args.token_rate or 'instant'}")
+    for concurrency in args.concurrency:
+        throughput, routes, stages = run_level(sessions, concurrency, stub)
+        print(f"\nconcurrency {concurrency}: {throughput:.1f} turns/s")
+        print(f"  {'route':<10} {'turns':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        for route, histogram in routes.items():
+            if histogram.count:
+                print(f"  {route:<10} {histogram.count:>7} {ms(histogram.percentile(0.5))} "
+                      f"{ms(histogram.percentile(0.95))} {ms(histogram.percentile(0.99))}")
+        for stage, histogram in stages.items():
+            if histogram.count:
+                print(f"  {'[' + stage + ']':<10} {histogram.count:>7} {ms(histogram.percentile(0.5))} "
+                      f"{ms(histogram.percentile(0.95))} {ms(histogram.percentile(0.99))}")
+
+    if args.long_session:
+        samples = memory_growth(args.long_session, StubOpenAI(latency=0.0))
+        print(f"\nmemory over one {args.long_session}-turn session (tracemalloc, excluding setup)")
+        print(f"  {'turns':>7} {'KiB':>9} {'KiB/turn':>9} {'context msgs':>13}")
+        for turns, grown, context_messages in samples:
+            print(f"  {turns:>7} {grown / 1024:>9.1f} {grown / 1024 / turns:>9.3f} {context_messages:>13}")
+
+
+if __name__ == "__main__":
+    main()
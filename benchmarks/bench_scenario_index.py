@@ -0,0 +1,104 @@
+"""
+Benchmark - ScenarioIndex vs. the original linear SequenceMatcher scan
+Run from the repository root:  python -m benchmarks.bench_scenario_index
+"""
+
+import argparse
+import random
+import time
+from difflib import SequenceMatcher
+
+from conversation_database import SCENARIO_RESPONSES
+from scenario_index import ScenarioIndex, SCENARIO_MATCH_THRESHOLD
+
+FILLER_WORDS = (
+    "really", "lately", "again", "at work", "at home", "every day", "somehow",
+    "with my team", "with my family", "this week", "since spring", "honestly",
+    "my manager", "my friends", "the project", "my studies", "all the time",
+)
+
+
+def linear_scan(scenarios: dict, user_message: str):
+    """The pre-index matching loop, kept verbatim for comparison"""
+    best_match = None
+    best_ratio = 0.0
+    for scenario_key, scenario_data in scenarios.items():
+        if "user" in scenario_data:
+            similarity = SequenceMatcher(None,
+                                         user_message.lower(),
+                                         scenario_data["user"].lower()).ratio()
+            if similarity > best_ratio and similarity >= SCENARIO_MATCH_THRESHOLD:
+                best_ratio = similarity
+                best_match = scenario_key
+    return best_match
+
+
+def synthetic_scenarios(size: int, rng: random.Random) -> dict:
+    """Grow the 10 curated prompts into `size` distinct scenario prompts"""
+    base = [data["user"] for data in SCENARIO_RESPONSES["anne"].values()]
+    scenarios = {}
+    for i in range(size):
+        words = rng.choice(base).rstrip(".").split()
+        for _ in range(rng.randint(1, 4)):
+            words.insert(rng.randrange(len(words) + 1), rng.choice(FILLER_WORDS))
+        words.append(f"#{i}")
+        scenarios[f"s{i}"] = {"title": f"Synthetic {i}", "user": " ".join(words) + "."}
+    return scenarios
+
+
+def perturb(text: str, rng: random.Random) -> str:
+    """Light typo noise so queries are near-verbatim, not exact"""
+    chars = list(text)
+    for _ in range(max(1, len(chars) // 25)):
+        pos = rng.randrange(len(chars))
+        chars[pos] = rng.choice("abcdefghijklmnopqrstuvwxyz ")
+    return "".join(chars)
+
+
+def make_queries(scenarios: dict, count: int, rng: random.Random) -> list:
+    """Half near-duplicates of stored prompts, half unrelated chatter"""
+    prompts = [data["user"] for data in scenarios.values()]
+    queries = []
+    for i in range(count):
+        if i % 2 == 0:
+            queries.append(perturb(rng.choice(prompts), rng))
+        else:
+            queries.append(" ".join(rng.choice(FILLER_WORDS) for _ in range(8)))
+    return queries
+
+
+def timed(func, queries: list) -> tuple:
+    start = time.perf_counter()
+    results = [func(q) for q in queries]
+    return results, (time.perf_counter() - start) / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 100000])
+    parser.add_argument("--queries", type=int, default=50,
+                        help="queries per size (linear scan is capped at 5 for >=100k)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'scenarios':>10} {'build ms':>10} {'linear ms/q':>12} {'index ms/q':>11} {'speedup':>8} {'agree':>7}")
+    for size in args.sizes:
+        rng = random.Random(args.seed)
+        scenarios = SCENARIO_RESPONSES["anne"] if size == 10 else synthetic_scenarios(size, rng)
+        queries = make_queries(scenarios, args.queries, rng)
+
+        start = time.perf_counter()
+        index = ScenarioIndex(scenarios)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        linear_queries = queries if size < 100000 else queries[:5]
+        expected, linear_s = timed(lambda q: linear_scan(scenarios, q), linear_queries)
+        got, index_s = timed(index.find, queries)
+        agree = sum(a == b for a, b in zip(expected, got)) / len(expected)
+
+        print(f"{size:>10} {build_ms:>10.1f} {linear_s * 1000:>12.3f} {index_s * 1000:>11.3f} "
+              f"{linear_s / index_s:>7.1f}x {agree:>6.0%}")
+
+
+if __name__ == "__main__":
+    main()
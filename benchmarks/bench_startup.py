@@ -0,0 +1,114 @@
+"""
+Benchmark - Cold start: module import time (python -X importtime) and coach construction
+Each measurement runs in a fresh interpreter, so nothing is cached in sys.modules; reports the
+import total, the most expensive modules, whether the OpenAI SDK was loaded, the time to build the
+first coach and the memory each additional coach session holds
+Run from the repository root:  python -m benchmarks.bench_startup
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ENTRY_MODULES = ("coach_engine", "Anne_Rosental", "main", "streamlit_app")
+HEAVY_MODULES = ("openai", "httpx", "conversation_database", "coach_engine")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_python(code: str, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *flags, "-c", code], cwd=ROOT, capture_output=True,
+                          text=True, check=True)
+
+
+def parse_importtime(stderr: str) -> list:
+    """[(module, self_us, cumulative_us, depth)] from `-X importtime` output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def measure_import(module: str, runs: int) -> dict:
+    """Median import time of `module` over `runs` fresh interpreters (interpreter startup excluded)"""
+    code = (f"import sys; import {module}; "
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    # Interpreter startup (site, encodings, ...) is logged first and is the same for every -c script
+    startup = len(parse_importtime(run_python("pass", "-X", "importtime").stderr))
+    totals, own, loaded = [], [], ""
+    for _ in range(runs):
+        result = run_python(code, "-X", "importtime")
+        own = parse_importtime(result.stderr)[startup:]
+        totals.append(sum(cumulative for _, _, cumulative, depth in own if depth == 0) / 1000)
+        loaded = result.stdout.strip()
+    top = sorted(own, key=lambda row: -row[1])
+    return {"total_ms": statistics.median(totals), "top": top, "loaded": loaded.split(",") if loaded else []}
+
+
+def construction_probe(coaches: int):
+    """Executed in a fresh interpreter: build coaches and print timings as JSON"""
+    import time
+    import tracemalloc
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    from Anne_Rosental import AnneRosental
+    from conversation_database import SCENARIO_RESPONSES
+    imported = time.perf_counter()
+    AnneRosental(AnneRosental.persona.system_prompt, SCENARIO_RESPONSES)
+    built = time.perf_counter()
+
+    baseline = tracemalloc.get_traced_memory()[0]
+    sessions = [AnneRosental(AnneRosental.persona.system_prompt, SCENARIO_RESPONSES) for _ in range(coaches)]
+    per_session = (tracemalloc.get_traced_memory()[0] - baseline) / max(len(sessions), 1)
+    print(json.dumps({
+        "import_ms": (imported - start) * 1000,
+        "first_coach_ms": (built - imported) * 1000,
+        "per_session_kib": per_session / 1024,
+        "openai_loaded": "openai" in sys.modules,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--modules", nargs="+", default=list(ENTRY_MODULES))
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per module (median reported)")
+    parser.add_argument("--top", type=int, default=8, help="most expensive modules listed per entry point")
+    parser.add_argument("--coaches", type=int, default=50, help="coach sessions built for the memory figure")
+    args = parser.parse_args()
+
+    print(f"{'module':<16}{'import ms':>11}  heavy modules loaded")
+    details = {}
+    for module in args.modules:
+        try:
+            details[module] = measure_import(module, args.runs)
+        except subprocess.CalledProcessError as e:
+            print(f"{module:<16}{'failed':>11}  {e.stderr.strip().splitlines()[-1] if e.stderr.strip() else ''}")
+            continue
+        result = details[module]
+        print(f"{module:<16}{result['total_ms']:>11.1f}  {', '.join(result['loaded']) or '-'}")
+
+    for module, result in details.items():
+        print(f"\n{module}: top {args.top} modules by self time")
+        for name, self_us, cumulative_us, _ in result["top"][:args.top]:
+            print(f"  {name:<40}{self_us / 1000:>8.1f} ms self{cumulative_us / 1000:>9.1f} ms cumulative")
+
+    probe = run_python(f"from benchmarks.bench_startup import construction_probe; "
+                       f"construction_probe({args.coaches})")
+    construction = json.loads(probe.stdout)
+    print("\nCoach construction (fresh interpreter)")
+    print(f"  import engine + database : {construction['import_ms']:.1f} ms")
+    print(f"  first coach              : {construction['first_coach_ms']:.1f} ms")
+    print(f"  memory per coach session : {construction['per_session_kib']:.1f} KiB")
+    print(f"  OpenAI SDK loaded        : {'yes' if construction['openai_loaded'] else 'no (deferred to the first request)'}")
+
+
+if __name__ == "__main__":
+    main()
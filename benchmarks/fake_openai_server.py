@@ -0,0 +1,190 @@
+"""
+Fake OpenAI-compatible HTTP server for load tests
+Serves POST /v1/chat/completions (plain JSON or SSE streaming) with configurable latency
+Run standalone:  python -m benchmarks.fake_openai_server --port 8399 --latency 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import threading
+import time
+
+REPLY_TEXT = ("That sounds like a lot to carry. What feels most important to "
+              "look at first, and what would make today a little lighter?")
+
+
+class FakeOpenAIServer:
+    """
+    Minimal HTTP/1.1 keep-alive server speaking the chat completions wire format.
+    Each request waits `latency` seconds before the first token, then streams
+    tokens at `token_rate` tokens/second (0 = instantly).
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 latency: float = 0.2, token_rate: float = 0.0, reply: str = REPLY_TEXT):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.token_rate = token_rate
+        self.reply = reply
+        self.requests = 0
+        self._seen_prefixes = set()
+        self._loop = None
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    # ===== LIFECYCLE =====
+    def start(self):
+        """Start serving on a background thread; returns once the port is bound"""
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port))
+            self.port = self._server.sockets[0].getsockname()[1]
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop(self):
+        """Close the listener, cancel open connections and stop the loop thread"""
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout=5)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+
+    async def _shutdown(self):
+        self._server.close()
+        current = asyncio.current_task()
+        tasks = [t for t in asyncio.all_tasks() if t is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # ===== REQUEST HANDLING =====
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                headers = {}
+                for line in head.decode("latin-1").split("\r\n")[1:]:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", "0")))
+                request = json.loads(body or b"{}")
+                self.requests += 1
+
+                await asyncio.sleep(self.latency)
+                if request.get("stream"):
+                    await self._write_stream(writer, request)
+                else:
+                    await self._write_json(writer, request)
+        except (asyncio.IncompleteReadError, asyncio.CancelledError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def _tokens(self) -> list:
+        return [word + " " for word in self.reply.split(" ")]
+
+    def _usage(self, request: dict, completion_tokens: int) -> dict:
+        """~4 chars/token; mimics prefix caching of a repeated first message (1024+ tokens, 128-token blocks)"""
+        messages = request.get("messages", [])
+        prompt_tokens = sum(len(m.get("content") or "") for m in messages) // 4
+        cached_tokens = 0
+        if messages:
+            prefix = messages[0].get("content") or ""
+            prefix_tokens = len(prefix) // 4
+            if prefix in self._seen_prefixes and prefix_tokens >= 1024:
+                cached_tokens = prefix_tokens // 128 * 128
+            self._seen_prefixes.add(prefix)
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached_tokens}
+        }
+
+    async def _write_json(self, writer, request: dict):
+        tokens = self._tokens()
+        if self.token_rate:
+            await asyncio.sleep(len(tokens) / self.token_rate)
+        payload = json.dumps({
+            "id": f"chatcmpl-fake-{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(tokens).strip()},
+                "finish_reason": "stop"
+            }],
+            "usage": self._usage(request, len(tokens))
+        }).encode()
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                     b"Content-Length: " + str(len(payload)).encode() + b"\r\n\r\n" + payload)
+        await writer.drain()
+
+    async def _write_stream(self, writer, request: dict):
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                     b"Transfer-Encoding: chunked\r\n\r\n")
+
+        def chunk(data: bytes):
+            writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+        for token in self._tokens():
+            event = {
+                "id": f"chatcmpl-fake-{self.requests}",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": request.get("model", "fake"),
+                "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]
+            }
+            chunk(b"data: " + json.dumps(event).encode() + b"\n\n")
+            await writer.drain()
+            if self.token_rate:
+                await asyncio.sleep(1 / self.token_rate)
+        if (request.get("stream_options") or {}).get("include_usage"):
+            event = {
+                "id": f"chatcmpl-fake-{self.requests}",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": request.get("model", "fake"),
+                "choices": [],
+                "usage": self._usage(request, len(self._tokens()))
+            }
+            chunk(b"data: " + json.dumps(event).encode() + b"\n\n")
+        chunk(b"data: [DONE]\n\n")
+        chunk(b"")
+        await writer.drain()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8399)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--token-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(args.host, args.port, args.latency, args.token_rate).start()
+    print(f"Fake OpenAI server on {server.base_url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Load test - get_response_async throughput as concurrent sessions increase
+Starts a local fake OpenAI-compatible server and drives creative turns through it
+Run from the repository root:  python -m benchmarks.load_async_sessions
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.fake_openai_server import FakeOpenAIServer
+from turn_metrics import LatencyHistogram
+
+# Messages that pass the safety gate and miss every scenario -> creative route
+CREATIVE_MESSAGES = (
+    "My week was strange and I'm still sorting through it.",
+    "I had a long talk with my sister yesterday.",
+    "Work is fine but something about it bugs me.",
+    "I started running again, slowly.",
+)
+
+
+async def run_session(coach, turns: int, latencies: LatencyHistogram):
+    for turn in range(turns):
+        start = time.perf_counter()
+        await coach.get_response_async(CREATIVE_MESSAGES[turn % len(CREATIVE_MESSAGES)])
+        latencies.record(time.perf_counter() - start)
+
+
+async def run_level(coach_factory, sessions: int, turns: int) -> tuple:
+    coaches = [coach_factory(i) for i in range(sessions)]
+    # One untimed turn per session first: client construction and connection setup are not measured
+    await asyncio.gather(*(coach.get_response_async(CREATIVE_MESSAGES[-1]) for coach in coaches))
+    latencies = LatencyHistogram()
+    start = time.perf_counter()
+    await asyncio.gather(*(run_session(coach, turns, latencies) for coach in coaches))
+    elapsed = time.perf_counter() - start
+    return latencies.count / elapsed, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4, 16, 64, 256])
+    parser.add_argument("--turns", type=int, default=5, help="timed creative turns per session (after one warmup)")
+    parser.add_argument("--latency", type=float, default=0.2, help="fake upstream latency (s)")
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(latency=args.latency).start()
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+
+    # Imported after the environment points at the fake server
+    from Anne_Rosental import AnneRosental
+    from Hiro_Lin import HiroLin
+    from Anne_Rosental_prompt import ANNE_SYSTEM_PROMPT
+    from Hiro_Lin_prompt import HIRO_SYSTEM_PROMPT
+    from conversation_database import SCENARIO_RESPONSES
+
+    def coach_factory(i: int):
+        if i % 2:
+            return HiroLin(HIRO_SYSTEM_PROMPT, SCENARIO_RESPONSES)
+        return AnneRosental(ANNE_SYSTEM_PROMPT, SCENARIO_RESPONSES)
+
+    async def run_all():
+        print(f"upstream latency {args.latency * 1000:.0f} ms, {args.turns} turns/session")
+        print(f"{'sessions':>9} {'turns/s':>9} {'p50 ms':>8} {'p95 ms':>8}")
+        for sessions in args.sessions:
+            throughput, latencies = await run_level(coach_factory, sessions, args.turns)
+            print(f"{sessions:>9} {throughput:>9.1f} {latencies.percentile(0.5) * 1000:>8.1f} "
+                  f"{latencies.percentile(0.95) * 1000:>8.1f}")
+
+    try:
+        asyncio.run(run_all())
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
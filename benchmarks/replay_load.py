@@ -0,0 +1,281 @@
+"""
+Replay load test - recorded conversation transcripts replayed against the coaches at N x speed
+Each user message is sent at its original offset (divided by --speed) from N worker processes
+with a stub LLM; reports queueing delay, per-route latency and where throughput saturates
+Run from the repository root:  python -m benchmarks.replay_load --transcripts sessions.jsonl
+"""
+
+import argparse
+import heapq
+import json
+import logging
+import multiprocessing
+import queue
+import random
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.routing_corpus import generate_sessions
+from benchmarks.stub_openai import StubOpenAI
+from turn_metrics import LatencyHistogram
+
+ROUTES = ("red", "amber", "scenario", "creative", "fallback")
+
+# A level is saturated when it completes less than this share of the offered turns/s ...
+SATURATION_THROUGHPUT = 0.9
+
+
+# ===== TRANSCRIPTS =====
+# A transcript is {"coach": key, "session_id": id, "messages": [history dicts with ISO timestamps]},
+# i.e. what coach.get_conversation_history() holds. Only user messages are replayed.
+
+def load_transcripts(path: str) -> list:
+    """Transcripts from a JSON lines file, one session per line"""
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def load_transcripts_from_db(path: str) -> list:
+    """Transcripts from a SESSION_DB_PATH database (session ids end in -<coach>, as in streamlit_app.py)"""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    rows = conn.execute("SELECT session_id, role, content, timestamp FROM session_messages ORDER BY id").fetchall()
+    conn.close()
+    sessions = {}
+    for session_id, role, content, timestamp in rows:
+        transcript = sessions.get(session_id)
+        if transcript is None:
+            coach = session_id.rsplit("-", 1)[-1]
+            transcript = sessions[session_id] = {
+                "coach": coach if coach in ("anne", "hiro") else "anne", "session_id": session_id, "messages": []}
+        transcript["messages"].append({"role": role, "content": content, "timestamp": timestamp})
+    return list(sessions.values())
+
+
+def synthesize_transcripts(count: int, turns: int, seed: int, arrivals_per_minute: float,
+                           think_seconds: float) -> list:
+    """Timestamped transcripts from the routing corpus: Poisson session arrivals, exponential think time"""
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 6, 9, 0)
+    arrival = 0.0
+    transcripts = []
+    for i, session in enumerate(generate_sessions(count, turns, seed)):
+        arrival += rng.expovariate(arrivals_per_minute / 60.0)
+        at = arrival
+        messages = []
+        for text in session["messages"]:
+            messages.append({"role": "user", "content": text, "timestamp": (start + timedelta(seconds=at)).isoformat()})
+            at += rng.expovariate(1.0 / think_seconds)
+        transcripts.append({"coach": session["coach"], "session_id": f"synthetic-{i}", "messages": messages})
+    return transcripts
+
+
+def schedule(transcripts: list) -> list:
+    """[(coach, [(offset seconds from the first message of the whole corpus, text), ...])]"""
+    parsed = []
+    for transcript in transcripts:
+        turns = [(datetime.fromisoformat(m["timestamp"]).timestamp(), m["content"])
+                 for m in transcript["messages"] if m["role"] == "user"]
+        if turns:
+            parsed.append((transcript["coach"], turns))
+    origin = min(turns[0][0] for _, turns in parsed)
+    return [(coach, [(at - origin, text) for at, text in turns]) for coach, turns in parsed]
+
+
+def mean_concurrent_sessions(sessions: list) -> float:
+    """Average number of sessions between their first and last message over the corpus span"""
+    span = max(turns[-1][0] for _, turns in sessions)
+    busy = sum(turns[-1][0] - turns[0][0] for _, turns in sessions)
+    return busy / span if span else float(len(sessions))
+
+
+# ===== WORKER PROCESS =====
+class _SessionReplay:
+    __slots__ = ('coach_key', 'turns', 'next_turn', 'coach')
+
+    def __init__(self, coach_key: str, turns: list):
+        self.coach_key = coach_key
+        self.turns = turns
+        self.next_turn = 0
+        self.coach = None
+
+
+def _make_coach(coach_key: str, stub: StubOpenAI):
+    from Anne_Rosental import AnneRosental
+    from Hiro_Lin import HiroLin
+    from conversation_database import SCENARIO_RESPONSES
+
+    coach_class = HiroLin if coach_key == "hiro" else AnneRosental
+    coach = coach_class(coach_class.persona.system_prompt, SCENARIO_RESPONSES)
+    coach.client = stub
+    return coach
+
+
+def replay_worker(job: tuple) -> dict:
+    """
+    Replay a share of the sessions in one process.
+
+    A dispatcher thread releases each turn at start + offset / speed (or when
+    the session's previous turn finished, if that is later: users wait for
+    the reply). `threads` workers run the turns; the time a released turn
+    waits for a free worker is its queueing delay.
+    """
+    sessions, speed, threads, latency, token_rate, start_at = job
+    logging.getLogger("coach.safety").setLevel(logging.CRITICAL + 1)
+    stub = StubOpenAI(latency=latency, token_rate=token_rate)
+    routes = {route: LatencyHistogram() for route in ROUTES}
+    queue_delay = LatencyHistogram()
+    lateness = LatencyHistogram()  # release time behind the transcript schedule (slow previous turn)
+
+    pending = []  # heap of (release time, seq, session)
+    ready = queue.SimpleQueue()
+    cond = threading.Condition()  # guards pending, remaining, seq and the histograms
+    remaining = [sum(len(turns) for _, turns in sessions)]
+    seq = 0
+    for coach_key, turns in sessions:
+        heapq.heappush(pending, (start_at + turns[0][0] / speed, seq, _SessionReplay(coach_key, turns)))
+        seq += 1
+
+    # Build the coaches before the clock starts (replay measures turns, not construction)
+    for _, _, session in pending:
+        session.coach = _make_coach(session.coach_key, stub)
+
+    def dispatch():
+        while True:
+            with cond:
+                while not pending and remaining[0]:
+                    cond.wait()
+                if not remaining[0]:
+                    break
+                release_at = pending[0][0]
+                now = time.time()
+                if now < release_at:
+                    cond.wait(release_at - now)
+                    continue
+                _, _, session = heapq.heappop(pending)
+            ready.put((release_at, session))
+        for _ in range(threads):
+            ready.put(None)
+
+    def work():
+        nonlocal seq
+        while True:
+            item = ready.get()
+            if item is None:
+                return
+            released_at, session = item
+            started = time.time()
+            offset, text = session.turns[session.next_turn]
+            session.coach.get_response(text)
+            finished = time.time()
+            session.next_turn += 1
+            with cond:
+                queue_delay.record(max(started - released_at, 0.0))
+                lateness.record(max(released_at - (start_at + offset / speed), 0.0))
+                routes[session.coach.last_route].record(finished - started)
+                remaining[0] -= 1
+                if session.next_turn < len(session.turns) and not session.coach.is_session_terminated():
+                    next_at = max(start_at + session.turns[session.next_turn][0] / speed, finished)
+                    heapq.heappush(pending, (next_at, seq, session))
+                    seq += 1
+                else:
+                    remaining[0] -= len(session.turns) - session.next_turn  # red zone ended the session
+                cond.notify()
+
+    dispatcher = threading.Thread(target=dispatch, daemon=True)
+    workers = [threading.Thread(target=work, daemon=True) for _ in range(threads)]
+    dispatcher.start()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return {"routes": routes, "queue_delay": queue_delay, "lateness": lateness, "finished": time.time()}
+
+
+# ===== DRIVER =====
+def run_level(sessions: list, speed: float, processes: int, threads: int, latency: float, token_rate: float) -> dict:
+    """Replay every session at `speed` x across `processes` processes; returns merged results"""
+    shares = [sessions[i::processes] for i in range(processes)]
+    start_at = time.time() + 1.0 + 0.2 * processes  # room for the workers to import and build coaches
+    jobs = [(share, speed, threads, latency, token_rate, start_at) for share in shares if share]
+    with multiprocessing.Pool(len(jobs)) as pool:
+        results = pool.map(replay_worker, jobs)
+
+    merged = {"routes": {route: LatencyHistogram() for route in ROUTES},
+              "queue_delay": LatencyHistogram(), "lateness": LatencyHistogram()}
+    for result in results:
+        for route, histogram in result["routes"].items():
+            merged["routes"][route].merge(histogram)
+        merged["queue_delay"].merge(result["queue_delay"])
+        merged["lateness"].merge(result["lateness"])
+    turns = sum(h.count for h in merged["routes"].values())
+    elapsed = max(result["finished"] for result in results) - start_at
+    span = max(turns_[-1][0] for _, turns_ in sessions) / speed
+    merged.update(turns=turns, elapsed=elapsed, throughput=turns / elapsed,
+                  offered=turns / span if span else float("inf"))
+    return merged
+
+
+def ms(seconds: float) -> str:
+    return f"{seconds * 1000:9.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--transcripts", help="JSON lines file of exported transcripts")
+    source.add_argument("--session-db", help="replay every session stored in this SESSION_DB_PATH database")
+    parser.add_argument("--synthetic", type=int, default=200, help="sessions to synthesize without a source")
+    parser.add_argument("--arrivals", type=float, default=30.0, help="synthetic sessions starting per minute")
+    parser.add_argument("--think", type=float, default=20.0, help="synthetic mean seconds between messages")
+    parser.add_argument("--turns", type=int, default=12, help="synthetic max user messages per session")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--speed", type=float, nargs="+", default=[1.0, 10.0, 100.0], help="time compression")
+    parser.add_argument("--processes", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--threads", type=int, default=32, help="turn workers per process")
+    parser.add_argument("--latency", type=float, default=0.5, help="stub LLM time to first token (s)")
+    parser.add_argument("--token-rate", type=float, default=0.0, help="stub LLM tokens/s (0 = instant)")
+    parser.add_argument("--max-queue-p99", type=float, default=0.25,
+                        help="queueing delay p99 (s) above which a level counts as saturated")
+    args = parser.parse_args()
+
+    if args.transcripts:
+        transcripts = load_transcripts(args.transcripts)
+    elif args.session_db:
+        transcripts = load_transcripts_from_db(args.session_db)
+    else:
+        transcripts = synthesize_transcripts(args.synthetic, args.turns, args.seed, args.arrivals, args.think)
+    sessions = schedule(transcripts)
+    concurrent = mean_concurrent_sessions(sessions)
+    span = max(turns[-1][0] for _, turns in sessions)
+    print(f"{len(sessions)} sessions, {sum(len(t) for _, t in sessions)} user turns over {span:.0f} s "
+          f"(mean {concurrent:.1f} concurrent sessions); {args.processes} processes x {args.threads} threads, "
+          f"stub latency {args.latency * 1000:.0f} ms")
+
+    carried = None
+    for speed in sorted(args.speed):
+        result = run_level(sessions, speed, args.processes, args.threads, args.latency, args.token_rate)
+        saturated = (result["throughput"] < SATURATION_THROUGHPUT * result["offered"]
+                     or result["queue_delay"].percentile(0.99) > args.max_queue_p99)
+        print(f"\n{speed:g}x: offered {result['offered']:.1f} turns/s, completed {result['throughput']:.1f} turns/s "
+              f"in {result['elapsed']:.1f} s{'  << SATURATED' if saturated else ''}")
+        print(f"  {'':<12} {'turns':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+        rows = [(route, histogram) for route, histogram in result["routes"].items() if histogram.count]
+        rows += [("[queueing]", result["queue_delay"]), ("[behind]", result["lateness"])]
+        for name, histogram in rows:
+            print(f"  {name:<12} {histogram.count:>7} {ms(histogram.percentile(0.5))} {ms(histogram.percentile(0.95))} "
+                  f"{ms(histogram.percentile(0.99))} {ms(histogram.max or 0.0)}")
+        if not saturated:
+            carried = speed
+
+    print()
+    if carried is None:
+        print("saturated at every speed: this node cannot carry the recorded traffic in real time")
+    else:
+        print(f"highest unsaturated level {carried:g}x: about {concurrent * carried:.0f} concurrent sessions "
+              f"({len(sessions) * carried:.0f} sessions per recorded span) with {args.processes} processes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Replayable corpus of synthetic coaching sessions for routing benchmarks
+Deterministic for a given seed; can be saved to / loaded from JSON lines (one session per line)
+"""
+
+import json
+import random
+
+from conversation_database import SCENARIO_RESPONSES
+from safety_engine import RED_KEYWORDS, AMBER_KEYWORDS
+
+# Share of turns per intended route (the rest are creative)
+DEFAULT_MIX = {"red": 0.01, "amber": 0.04, "scenario": 0.25}
+
+OPENERS = (
+    "Hi, I'm Maria.", "Hello there.", "Hey, Tom here.", "Good morning.",
+    "I'm not sure where to begin.", "My name is Lena.",
+)
+CHATTER = (
+    "My week was strange and I'm still sorting through it.",
+    "I had a long talk with my sister yesterday.",
+    "Work is fine but something about it bugs me.",
+    "I started running again, slowly.",
+    "My manager gave me feedback that I keep replaying.",
+    "We moved flats last month and everything is still in boxes.",
+    "I'd like to be more patient with my kids.",
+    "There is a conference next week and I'm presenting.",
+    "I noticed I get irritated in meetings a lot.",
+    "What would you suggest as a first small step?",
+)
+FILLER = ("really", "lately", "honestly", "again", "somehow", "these days")
+
+
+def _near_copy(text: str, rng: random.Random) -> str:
+    """Scenario prompt with a filler word or a dropped word, still above the match threshold"""
+    words = text.split()
+    if rng.random() < 0.5:
+        words.insert(rng.randrange(len(words) + 1), rng.choice(FILLER))
+    else:
+        del words[rng.randrange(len(words))]
+    return " ".join(words)
+
+
+def _safety_message(keywords: tuple, rng: random.Random) -> str:
+    return f"{rng.choice(CHATTER)} Honestly I {rng.choice(keywords)} right now."
+
+
+def generate_sessions(count: int, turns: int, seed: int = 7, mix: dict = None) -> list:
+    """
+    `count` sessions of up to `turns` user messages, alternating coaches.
+    A red message ends its session, as it does in the apps.
+    Returns [{"coach": key, "messages": [text, ...]}].
+    """
+    mix = mix or DEFAULT_MIX
+    rng = random.Random(seed)
+    sessions = []
+    for i in range(count):
+        coach = ("anne", "hiro")[i % 2]
+        prompts = [data["user"] for data in SCENARIO_RESPONSES[coach].values() if "user" in data]
+        messages = [rng.choice(OPENERS)]
+        while len(messages) < turns:
+            roll = rng.random()
+            if roll < mix["red"]:
+                messages.append(_safety_message(RED_KEYWORDS, rng))
+                break
+            roll -= mix["red"]
+            if roll < mix["amber"]:
+                messages.append(_safety_message(AMBER_KEYWORDS, rng))
+            elif roll - mix["amber"] < mix["scenario"]:
+                messages.append(_near_copy(rng.choice(prompts), rng))
+            else:
+                messages.append(rng.choice(CHATTER))
+        sessions.append({"coach": coach, "messages": messages})
+    return sessions
+
+
+def save_sessions(sessions: list, path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        for session in sessions:
+            f.write(json.dumps(session) + "\n")
+
+
+def load_sessions(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
@@ -0,0 +1,60 @@
+"""
+In-process stand-in for the OpenAI client, for benchmarks
+Answers chat.completions.create (plain or streaming) after a configurable latency and token rate
+"""
+
+import time
+from types import SimpleNamespace
+
+REPLY_TEXT = ("That sounds like a lot to carry. What feels most important to "
+              "look at first, and what would make today a little lighter?")
+
+
+def _usage(messages: list, completion_tokens: int) -> SimpleNamespace:
+    prompt_tokens = sum(len(m["content"]) for m in messages) // 4 + 1
+    return SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                           total_tokens=prompt_tokens + completion_tokens,
+                           prompt_tokens_details=SimpleNamespace(cached_tokens=0))
+
+
+class _Completions:
+    def __init__(self, stub):
+        self._stub = stub
+
+    def create(self, messages: list, stream: bool = False, **kwargs):
+        stub = self._stub
+        stub.requests += 1
+        tokens = stub.reply.split(" ")
+        time.sleep(stub.latency)
+        if stream:
+            return self._stream(messages, tokens)
+        if stub.token_rate:
+            time.sleep(len(tokens) / stub.token_rate)
+        message = SimpleNamespace(role="assistant", content=stub.reply)
+        return SimpleNamespace(choices=[SimpleNamespace(index=0, message=message, finish_reason="stop")],
+                               usage=_usage(messages, len(tokens)))
+
+    def _stream(self, messages: list, tokens: list):
+        for i, token in enumerate(tokens):
+            if i and self._stub.token_rate:
+                time.sleep(1 / self._stub.token_rate)
+            delta = SimpleNamespace(content=token if i == 0 else " " + token)
+            yield SimpleNamespace(choices=[SimpleNamespace(index=0, delta=delta, finish_reason=None)],
+                                  usage=None)
+        yield SimpleNamespace(choices=[], usage=_usage(messages, len(tokens)))
+
+
+class StubOpenAI:
+    """
+    Drop-in for `openai.OpenAI` as used by the coaches (coach.client = StubOpenAI()).
+    Each call sleeps `latency` seconds before the first token, then produces
+    `token_rate` tokens/second (0 = instantly). Thread-safe enough for
+    benchmarks; `requests` is approximate under concurrency.
+    """
+
+    def __init__(self, latency: float = 0.05, token_rate: float = 0.0, reply: str = REPLY_TEXT):
+        self.latency = latency
+        self.token_rate = token_rate
+        self.reply = reply
+        self.requests = 0
+        self.chat = SimpleNamespace(completions=_Completions(self))
@@ -0,0 +1,95 @@
+"""
+Chat Message - Compact history record shared by the session store and the context window
+One small slotted object per message instead of a dict with an ISO timestamp string;
+the API payload dicts live only in the (token-budgeted) context window
+"""
+
+import sys
+import threading
+import time
+from datetime import datetime
+
+# Interned role strings: every record shares the same three objects
+SYSTEM = sys.intern("system")
+USER = sys.intern("user")
+ASSISTANT = sys.intern("assistant")
+_ROLES = {role: role for role in (SYSTEM, USER, ASSISTANT)}
+
+_clock_lock = threading.Lock()
+_last_timestamp = 0
+
+
+def intern_role(role: str) -> str:
+    """The shared string object for a role name"""
+    return _ROLES.get(role) or sys.intern(role)
+
+
+def message_timestamp() -> int:
+    """
+    Wall-clock milliseconds since the epoch, strictly increasing within the
+    process (never goes backwards when the system clock is adjusted)
+    """
+    global _last_timestamp
+    now = time.time_ns() // 1_000_000
+    with _clock_lock:
+        _last_timestamp = max(now, _last_timestamp + 1)
+        return _last_timestamp
+
+
+class ChatMessage:
+    """
+    One history message: interned role, content, integer timestamp (ms, see
+    message_timestamp) and the pinned flag.
+
+    Also readable like the history dicts it replaces: message["role"],
+    message["content"], message["timestamp"] (ISO string, local time) and
+    message.get("pinned", False).
+    """
+    __slots__ = ('role', 'content', 'ts', 'pinned')
+
+    def __init__(self, role: str, content: str, ts: int = None, pinned: bool = False):
+        self.role = intern_role(role)
+        self.content = content
+        self.ts = message_timestamp() if ts is None else ts
+        self.pinned = pinned
+
+    @classmethod
+    def from_dict(cls, message: dict) -> "ChatMessage":
+        """Convert a legacy history dict ({"role", "content", "timestamp", "pinned"?})"""
+        timestamp = message.get("timestamp")
+        ts = int(datetime.fromisoformat(timestamp).timestamp() * 1000) if timestamp else None
+        return cls(message["role"], message["content"], ts, bool(message.get("pinned", False)))
+
+    @property
+    def timestamp(self) -> str:
+        return datetime.fromtimestamp(self.ts / 1000).isoformat()
+
+    # ===== DICT COMPATIBILITY =====
+    def __getitem__(self, key: str):
+        if key == "role":
+            return self.role
+        if key == "content":
+            return self.content
+        if key == "timestamp":
+            return self.timestamp
+        if key == "pinned" and self.pinned:
+            return True
+        raise KeyError(key)
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.keys()
+
+    def keys(self) -> tuple:
+        return ("role", "content", "timestamp", "pinned") if self.pinned else ("role", "content", "timestamp")
+
+    def as_dict(self) -> dict:
+        return {key: self[key] for key in self.keys()}
+
+    def __repr__(self):
+        return f"ChatMessage({self.role!r}, {self.content[:40]!r}, ts={self.ts}{', pinned' if self.pinned else ''})"
@@ -0,0 +1,778 @@
+"""
+Coach Engine - Shared conversation engine behind every coach
+Routes each message through pluggable stages (Safety > Scenario > Creative) with per-stage timing;
+persona differences (prompts, safety texts, name usage) come from coach_personas.py
+"""
+
+import random
+import re
+import time
+import uuid
+from chat_message import ChatMessage
+from safety_engine import SAFETY_ENGINE
+from content_store import ContentStore
+from scenario_index import get_scenario_index
+from openai_clients import get_async_client, get_sync_client, preconnect
+from speculative_routing import SpeculativeRouter
+from batch_routing import BatchClassification, DEFAULT_CHUNK_SIZE, classify_messages
+from context_window import ContextWindow, DEFAULT_CONTEXT_BUDGET
+from session_memory import SessionSummarizer
+from prompt_layout import build_chat_messages, prompt_fingerprint, PromptCacheStats, PROCESS_PROMPT_CACHE_STATS
+from response_cache import response_cache_key
+from session_store import InMemorySessionStore, state_property
+from coach_personas import COACH_PERSONAS
+from turn_metrics import TURN_METRICS
+from resilience import OPENAI_RESILIENCE
+from rate_limiter import OPENAI_RATE_LIMITER, estimate_request_tokens
+
+# Relaxed scenario similarity accepted when OpenAI is unavailable
+FALLBACK_SCENARIO_THRESHOLD = 0.5
+
+# Keywords indicating the user is asking about professional help
+PROFESSIONAL_HELP_KEYWORDS = (
+    'call', 'calling', 'hotline', 'therapist', 'counselor', 'counsellor',
+    'psychologist', 'psychiatrist', 'doctor', 'professional', 'help',
+    'telefonseelsorge', 'helpline', 'emergency', 'hospital',
+    'how do i', 'how can i', 'where can i', 'what should i',
+    'reach out', 'get help', 'find help', 'seek help',
+    'appointment', 'talk to someone', 'contact', 'number'
+)
+
+# "I'm [Name]" / "I am [Name]" / "My name is [Name]" / "This is [Name]"
+NAME_INTRO_PATTERN = re.compile(r"(?:i'm|i am|my name is|this is)\s+([A-Z][a-z]+)", re.IGNORECASE)
+# "Hi, [Name] here" / "[Name] here"
+NAME_HERE_PATTERN = re.compile(r"(?:hi,?\s+)?([A-Z][a-z]+)\s+here", re.IGNORECASE)
+
+
+# ===== PIPELINE STAGES =====
+class SafetyStage:
+    """PRIORITY 1: red/amber messages get the persona's safety response (pinned in the context)"""
+    name = "safety"
+
+    def handle(self, coach, user_message: str):
+        scan = coach.scan_safety(user_message)
+        safety_level = scan.zone
+        if safety_level not in ('red', 'amber'):
+            return None
+
+        coach.last_route = safety_level
+        safety_response = coach.get_safety_response(safety_level)
+        coach.add_message("user", user_message, pinned=True)
+
+        # For logging, store the full message or initial part for red zone
+        if isinstance(safety_response, dict):
+            coach.add_message("assistant", safety_response["initial"], pinned=True)
+        else:
+            coach.add_message("assistant", safety_response, pinned=True)
+
+        # Red zone is a high-risk event: END SESSION IMMEDIATELY
+        if safety_level == 'red':
+            coach.red_zone_triggered = True
+
+        # Audit trail (written in the background, see safety_audit.py)
+        coach.log_safety_event(scan, user_message)
+
+        coach.response_count += 1
+
+        # Dict for red (timed delivery), string for amber
+        return safety_response
+
+
+class ScenarioStage:
+    """PRIORITY 2: pre-written database response for a matching scenario"""
+    name = "scenario"
+
+    def handle(self, coach, user_message: str):
+        scenario_key = coach.find_matching_scenario(user_message)
+        if not scenario_key:
+            return None
+        exact_response = coach.get_exact_response(scenario_key)
+        if not exact_response:
+            return None
+
+        coach.add_message("user", user_message)
+        coach.add_message("assistant", exact_response)
+        coach.session_started = True
+        return coach._personalize(exact_response)
+
+
+class CreativeStage:
+    """
+    PRIORITY 3: OpenAI completion. Always answers, so it is the last stage;
+    besides handle() it has async and streaming variants.
+    """
+    name = "creative"
+
+    def handle(self, coach, user_message: str) -> str:
+        response = coach.get_creative_response(user_message)
+        coach.session_started = True
+        return coach._personalize(response)
+
+    async def handle_async(self, coach, user_message: str) -> str:
+        response = await coach.get_creative_response_async(user_message)
+        coach.session_started = True
+        return coach._personalize(response)
+
+    def stream(self, coach, user_message: str):
+        coach.session_started = True
+        return coach._personalize_stream(coach.stream_creative_response(user_message))
+
+
+DEFAULT_ROUTING_STAGES = (SafetyStage(), ScenarioStage())
+DEFAULT_CREATIVE_STAGE = CreativeStage()
+
+
+class BaseCoach:
+    """
+    Coach handler: hybrid response system (database + creative) for one persona.
+
+    Messages run through `routing_stages` in order; the first stage returning
+    a response wins, otherwise `creative_stage` answers. Stages are shared,
+    stateless objects with a `name` and `handle(coach, user_message)`, so a
+    subclass can insert, replace or reorder them. The duration of every stage
+    that ran in the last turn is kept in `stage_timings` (seconds, by stage
+    name) and the stage that answered in `last_route`
+    ('red', 'amber', 'scenario', 'creative', or 'fallback' when OpenAI was
+    unavailable, see resilience.py). Creative turns add 'prompt'
+    (payload assembly), 'openai' (API call) and, when streaming, 'ttft'
+    (time to first token); 'turn' is the whole turn. Finished turns go to
+    TURN_METRICS (turn_metrics.py) when it is enabled.
+    """
+    persona = None
+    routing_stages = DEFAULT_ROUTING_STAGES
+    creative_stage = DEFAULT_CREATIVE_STAGE
+
+    def __init__(self, system_prompt: str, scenario_responses: dict,
+                 context_budget: int = DEFAULT_CONTEXT_BUDGET, count_tokens=None,
+                 summarize_every: int = 0, response_cache=None, semantic_router=None,
+                 session_store=None, session_id: str = None, persona=None):
+        """
+        Initialize the coach with system prompt and scenario database.
+        scenario_responses is the SCENARIO_RESPONSES dict or a ContentStore (see content_store.py),
+        whose current scenarios and index are used on every turn.
+        context_budget caps the history tokens sent per completion; count_tokens
+        is an optional text -> token count function (default: tiktoken or estimate).
+        summarize_every > 0 enables a background session-memory roll-up every N replies.
+        response_cache (see response_cache.py) serves repeated first messages without an API call.
+        semantic_router (see semantic_router.py) catches paraphrased scenarios fuzzy matching misses.
+        session_store/session_id (see session_store.py) persist history and flags; passing an
+        existing session_id resumes that conversation, loaded lazily on first use.
+        persona (see coach_personas.py) overrides the class persona.
+        """
+        if persona is not None:
+            self.persona = persona
+        # Retries, deadlines and the circuit breaker are handled by self.resilience,
+        # RPM/TPM admission by self.rate_limiter (both shared process-wide)
+        self._client = None  # see the client property
+        self.resilience = OPENAI_RESILIENCE
+        self.rate_limiter = OPENAI_RATE_LIMITER
+        self._reservation = None  # rate limiter reservation awaiting response.usage
+        self._speculation = None  # routing work done while the user types, see prepare()
+        self.model = self.persona.model
+        self.system_prompt = system_prompt
+        self.prompt_version = prompt_fingerprint(system_prompt)
+        self.prompt_cache_stats = PromptCacheStats()
+        self.response_cache = response_cache
+        # A ContentStore is read per turn (hot reloaded content); a plain dict is fixed
+        self.content = scenario_responses if isinstance(scenario_responses, ContentStore) else None
+        self._turn_content = None  # ContentSnapshot pinned from _start_turn to _end_turn
+        self._speculation_content = None  # snapshot current when prepare() last ran
+        if self.content is None:
+            self._scenario_responses = scenario_responses.get(self.persona.key, {})
+            self._scenario_index = get_scenario_index(self._scenario_responses)
+        self.semantic_router = semantic_router
+        self.session_store = session_store or InMemorySessionStore()
+        self.session_id = session_id or uuid.uuid4().hex
+        self._session = None  # opened lazily from session_store
+        self.context = ContextWindow(context_budget, count_tokens)
+        self.session_memory = SessionSummarizer(summarize_every) if summarize_every else None
+        self.stage_timings = {}
+        self.last_route = None
+        self.turn_usage = None
+        self._turn_started = None
+
+    # Session flags live in the session store so they survive restarts
+    session_started = state_property("session_started", False)
+    red_zone_triggered = state_property("red_zone_triggered", False, durable=True)
+    response_count = state_property("response_count", 0)  # Track number of responses for name usage
+    user_name = state_property("user_name", None)  # Store user's first name
+
+    def _content_snapshot(self):
+        """The turn's pinned ContentSnapshot, or the store's current one outside a turn"""
+        return self._turn_content or self.content.snapshot
+
+    @property
+    def scenario_responses(self) -> dict:
+        """
+        This coach's scenarios. With a ContentStore, index and responses come
+        from one snapshot per turn, so a hot reload mid-turn cannot split them.
+        """
+        if self.content is not None:
+            return self._content_snapshot().scenarios.get(self.persona.key, {})
+        return self._scenario_responses
+
+    @property
+    def scenario_index(self):
+        if self.content is not None:
+            return self._content_snapshot().index(self.persona.key)
+        return self._scenario_index
+
+    @property
+    def client(self):
+        """
+        OpenAI client: the shared process-wide one (created on the first LLM call)
+        unless one was assigned, e.g. a stub in tests and benchmarks
+        """
+        return self._client or get_sync_client()
+
+    @client.setter
+    def client(self, client):
+        self._client = client
+
+    @property
+    def session(self):
+        """Backing session, loaded from the session store on first access"""
+        if self._session is None:
+            self._session = self.session_store.open(self.session_id)
+            # Rebuild the context window when resuming an existing conversation
+            for msg in self._session.messages:
+                self.context.append(msg.role, msg.content, msg.pinned)
+        return self._session
+
+    @property
+    def conversation_history(self) -> list:
+        """Conversation history, read through the session store"""
+        return self.session.messages
+
+    def add_message(self, role: str, content: str, pinned: bool = False):
+        """
+        Add message to conversation history and the context window.
+        Pinned messages (safety exchanges) are never trimmed from the context.
+        """
+        message = ChatMessage(role, content, pinned=pinned)
+        self.session.append(message)
+        self.context.append(message.role, message.content, pinned)
+
+        # Schedule a background roll-up of older turns when one is due
+        if role == "assistant" and self.session_memory:
+            # The client is only resolved if a summary actually runs (safety turns never need one)
+            self.session_memory.note_turn(self.context, lambda: self.client, self.model)
+
+    # ===== SAFETY =====
+    def scan_safety(self, user_message: str):
+        """
+        Scan the message with the shared compiled scanner in safety_engine.py (single pass).
+        Returns a SafetyScan: zone plus the matched phrases.
+        """
+        if self._speculation is not None:
+            return self._speculation.safety_scan(user_message)
+        return SAFETY_ENGINE.scan(user_message)
+
+    def detect_safety_level(self, user_message: str) -> str:
+        """
+        Detect safety level: 'red', 'amber', or 'green'
+        Returns: 'red' (crisis), 'amber' (warning), 'green' (normal)
+        """
+        return self.scan_safety(user_message).zone
+
+    def log_safety_event(self, scan, user_message: str):
+        """Enqueue a structured audit event for a red/amber scan (never blocks on I/O)"""
+        from safety_audit import SafetyEvent, get_safety_audit_log, message_hash  # loaded on the first event
+
+        matched_phrase = next((match.phrase for match in scan.matches if match.zone == scan.zone), None)
+        get_safety_audit_log().record(SafetyEvent(self.session_id, self.persona.key, scan.zone,
+                                                  matched_phrase, message_hash(user_message)))
+
+    def get_safety_response(self, level: str) -> dict:
+        """
+        Return appropriate safety response based on level.
+        For red zone, returns a dict with separate messages for timed delivery.
+        For amber zone, returns the full response as a string.
+        """
+        if level == 'red':
+            # RED ZONE - Crisis response split into timed messages
+            # FIRST MESSAGE: Compassionate sentences + Hotline info
+            # FOLLOW-UPS (5 and 10 sec later - handled by the UI): Care message + stop message
+            name_part = f", {self.user_name}" if self.user_name else ""
+            return {
+                "type": "red",
+                "initial": self.persona.red_initial.format(name_part=name_part),
+                "care_message": self.persona.care_message,
+                "stop_message": self.persona.stop_message
+            }
+
+        elif level == 'amber':
+            # AMBER ZONE - Transition response (gentle escalation)
+            return self.persona.amber_message
+
+        return None
+
+    def get_termination_warning(self) -> str:
+        """Return the warning message for when user tries to continue after red zone"""
+        return self.persona.termination_warning
+
+    def is_asking_about_professional_help(self, user_message: str) -> bool:
+        """
+        Detect if user is asking about reaching out to professional help.
+        Returns True if user is asking about professional support (allow conversation to continue).
+        Returns False if user wants to continue chatting about other things (terminate).
+        """
+        message_lower = user_message.lower()
+        return any(keyword in message_lower for keyword in PROFESSIONAL_HELP_KEYWORDS)
+
+    # ===== SCENARIOS =====
+    def find_matching_scenario(self, user_message: str) -> str:
+        """
+        Find matching scenario using fuzzy text matching (70%+ similarity),
+        then the semantic router (if configured) for paraphrases
+        """
+        if self._speculation is not None:
+            looked_up, scenario_key = self._speculation.scenario_match(user_message)
+            if looked_up:
+                return scenario_key
+        return self._find_scenario(user_message)
+
+    def _find_scenario(self, user_message: str) -> str:
+        scenario_key = self.scenario_index.find(user_message)
+        if scenario_key is None and self.semantic_router is not None:
+            scenario_key = self.semantic_router.find(user_message)
+        return scenario_key
+
+    def get_exact_response(self, scenario_key: str) -> str:
+        """Get exact pre-written response from database"""
+        if scenario_key in self.scenario_responses:
+            return self.scenario_responses[scenario_key].get(self.persona.key, "")
+        return ""
+
+    # ===== NAME USAGE =====
+    def _extract_user_name(self, message: str) -> str:
+        """
+        Extract first name from user introduction
+        Returns None if no name detected
+        """
+        for pattern in (NAME_INTRO_PATTERN, NAME_HERE_PATTERN):
+            match = pattern.search(message)
+            if match:
+                return match.group(1).capitalize()
+        return None
+
+    def _name_due(self) -> bool:
+        """Count one more response; True if this one should address the user by name"""
+        self.response_count += 1
+        every = self.persona.name_every
+        return bool(every and self.user_name and self.response_count % every == 0)
+
+    def _personalize(self, response: str) -> str:
+        """Track the response and add the user's name when due"""
+        if self._name_due():
+            return self._add_name_naturally(response, self.user_name)
+        return response
+
+    def _personalize_stream(self, deltas):
+        """Streaming version of _personalize"""
+        if self._name_due():
+            return self._stream_name_naturally(deltas, self.user_name)
+        return deltas
+
+    def _add_name_naturally(self, response: str, name: str) -> str:
+        """
+        Add name naturally to response - at beginning or end
+        60% probability at end (more natural), 40% at beginning
+        """
+        if random.random() < 0.6:
+            return self._add_name_at_end(response, name)
+        return self._add_name_at_beginning(response, name)
+
+    def _add_name_at_end(self, response: str, name: str) -> str:
+        """Add name at end before final punctuation"""
+        if response.endswith(('.', '?', '!')):
+            return response[:-1] + f", {name}" + response[-1]
+        elif response.endswith('"'):
+            # Handle quoted endings
+            return response[:-1].rstrip('.?!') + f", {name}." + '"'
+        return response + f", {name}."
+
+    def _add_name_at_beginning(self, response: str, name: str) -> str:
+        """Add name at beginning, lowercasing the original first letter"""
+        return f"{name}, " + response[0].lower() + response[1:]
+
+    def _stream_name_naturally(self, deltas, name: str):
+        """
+        Streaming version of _add_name_naturally.
+        For the end position the last delta is held back until the stream
+        finishes, so the name can go before the final punctuation.
+        """
+        if random.random() < 0.6:
+            pending = None
+            for delta in deltas:
+                if pending is not None:
+                    yield pending
+                pending = delta
+            if pending is not None:
+                yield self._add_name_at_end(pending, name)
+        else:
+            named = False
+            for delta in deltas:
+                if not named and delta:
+                    delta = self._add_name_at_beginning(delta, name)
+                    named = True
+                yield delta
+
+    # ===== CREATIVE (OPENAI) =====
+    def _build_messages(self) -> list:
+        """
+        Build the chat completion payload:
+        system prompt + session memory (if any) + token-budgeted history
+        """
+        if self.session_memory:
+            self.session_memory.apply_pending(self.context)
+
+        # Static system prompt first and untouched, so the provider's prefix cache can hit
+        memory_message = self.context.memory_message()
+        dynamic_messages = [memory_message] if memory_message else []
+        return build_chat_messages(self.system_prompt, dynamic_messages, self.context.messages())
+
+    def _completion_params(self) -> dict:
+        """Chat completion arguments shared by the sync, async and streaming calls"""
+        started = time.perf_counter()
+        messages = self._build_messages()
+        self.stage_timings["prompt"] = time.perf_counter() - started
+        return {
+            "model": self.model,
+            "messages": messages,
+            "temperature": self.persona.temperature,
+            "max_tokens": self.persona.max_tokens,
+            "extra_body": {"prompt_cache_key": f"{self.persona.key}-{self.prompt_version}"}
+        }
+
+    def _create_completion(self, **params):
+        """
+        chat.completions.create behind the rate limiter. Runs once per attempt,
+        so retries are admitted too; the reservation is reconciled with
+        response.usage in _record_usage.
+        """
+        tokens = estimate_request_tokens(params["messages"], params.get("max_tokens"))
+        reservation = self.rate_limiter.acquire(self.session_id, tokens)
+        try:
+            response = self.client.chat.completions.create(**params)
+        except Exception:
+            reservation.release()
+            raise
+        self._reservation = reservation
+        return response
+
+    async def _create_completion_async(self, **params):
+        """Async version of _create_completion using the shared AsyncOpenAI client"""
+        tokens = estimate_request_tokens(params["messages"], params.get("max_tokens"))
+        reservation = await self.rate_limiter.acquire_async(self.session_id, tokens)
+        try:
+            response = await get_async_client().chat.completions.create(**params)
+        except Exception:
+            reservation.release()
+            raise
+        self._reservation = reservation
+        return response
+
+    def _record_usage(self, usage):
+        """Record prompt cache usage (cached_tokens) for this call"""
+        self.turn_usage = usage
+        if self._reservation is not None:
+            self._reservation.reconcile(usage)
+            self._reservation = None
+        self.prompt_cache_stats.record(usage)
+        PROCESS_PROMPT_CACHE_STATS.record(usage)
+
+    def _release_reservation(self):
+        """The call failed before its usage arrived: give the estimated tokens back"""
+        if self._reservation is not None:
+            self._reservation.release()
+            self._reservation = None
+
+    def _cache_lookup(self, user_message: str) -> tuple:
+        """
+        Return (cache_key, cached_response) for the response cache.
+        Only turns without any prior context (first turn of a session) are
+        cacheable; otherwise returns (None, None).
+        """
+        self.session  # a resumed session fills the context window when it is loaded
+        if self.response_cache is None or len(self.context) or self.context.memory is not None:
+            return None, None
+        cache_key = response_cache_key(self.persona.key, user_message, self.prompt_version)
+        return cache_key, self.response_cache.get(cache_key)
+
+    def get_fallback_response(self, user_message: str) -> str:
+        """
+        Reply when the OpenAI call failed or the circuit breaker is open:
+        the closest scenario at a relaxed similarity, else the persona's apology
+        """
+        self.last_route = "fallback"
+        scenario_key, _ = self.scenario_index.match(user_message, threshold=FALLBACK_SCENARIO_THRESHOLD)
+        exact_response = self.get_exact_response(scenario_key) if scenario_key else ""
+        return exact_response or self.persona.fallback_message
+
+    def _finish_creative(self, cache_key: str, assistant_message: str) -> str:
+        self.add_message("assistant", assistant_message)
+        if cache_key:
+            self.response_cache.set(cache_key, assistant_message)
+        return assistant_message
+
+    def get_creative_response(self, user_message: str) -> str:
+        """Generate creative response using OpenAI API"""
+        cache_key, cached_response = self._cache_lookup(user_message)
+        self.add_message("user", user_message)
+        if cached_response is not None:
+            self.add_message("assistant", cached_response)
+            return cached_response
+
+        try:
+            params = self._completion_params()
+            started = time.perf_counter()
+            response = self.resilience.call(self._create_completion, **params)
+            self.stage_timings["openai"] = time.perf_counter() - started
+            self._record_usage(response.usage)
+            return self._finish_creative(cache_key, response.choices[0].message.content)
+
+        except Exception as e:
+            fallback_response = self.get_fallback_response(user_message)
+            self.add_message("assistant", fallback_response)
+            return fallback_response
+
+    async def get_creative_response_async(self, user_message: str) -> str:
+        """Async version of get_creative_response using the shared AsyncOpenAI client"""
+        cache_key, cached_response = self._cache_lookup(user_message)
+        self.add_message("user", user_message)
+        if cached_response is not None:
+            self.add_message("assistant", cached_response)
+            return cached_response
+
+        try:
+            params = self._completion_params()
+            started = time.perf_counter()
+            response = await self.resilience.call_async(self._create_completion_async, **params)
+            self.stage_timings["openai"] = time.perf_counter() - started
+            self._record_usage(response.usage)
+            return self._finish_creative(cache_key, response.choices[0].message.content)
+
+        except Exception as e:
+            fallback_response = self.get_fallback_response(user_message)
+            self.add_message("assistant", fallback_response)
+            return fallback_response
+
+    def stream_creative_response(self, user_message: str):
+        """
+        Streaming version of get_creative_response.
+        Yields text deltas as they arrive; the complete assistant message is
+        written to conversation_history once the stream ends.
+        """
+        cache_key, cached_response = self._cache_lookup(user_message)
+        self.add_message("user", user_message)
+        if cached_response is not None:
+            yield cached_response
+            self.add_message("assistant", cached_response)
+            return
+
+        parts = []
+        stream = None
+
+        try:
+            params = self._completion_params()
+            started = time.perf_counter()
+            stream = self.resilience.call(
+                self._create_completion,
+                **params,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+
+            for chunk in stream:
+                # The final chunk carries usage and no choices
+                if getattr(chunk, "usage", None):
+                    self._record_usage(chunk.usage)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if not parts:
+                        self.stage_timings["ttft"] = time.perf_counter() - started
+                    parts.append(delta)
+                    yield delta
+            self.stage_timings["openai"] = time.perf_counter() - started
+
+            if cache_key:
+                self.response_cache.set(cache_key, "".join(parts))
+
+        except Exception as e:
+            if stream is not None:
+                # Opening the stream counted as a success; the upstream broke while it was read
+                self.resilience.stream_failed(e)
+            # A stream that broke before its usage chunk never settles the reservation
+            self._release_reservation()
+            # Keep whatever already reached the user; apologize only if nothing did
+            if not parts:
+                fallback_response = self.get_fallback_response(user_message)
+                parts.append(fallback_response)
+                yield fallback_response
+
+        self.add_message("assistant", "".join(parts))
+
+    # ===== ROUTING PIPELINE =====
+    def prepare(self, partial_message: str) -> str:
+        """
+        Feed the text typed so far (call on every change before submit).
+        Runs the safety scan incrementally and the scenario lookup ahead of
+        time, and warms a connection to the API, so the submit that follows
+        only handles what changed. Returns the partial text's safety zone;
+        the turn itself still starts at get_response/stream_response.
+        """
+        if self._speculation is None:
+            self._speculation = SpeculativeRouter(SAFETY_ENGINE, self._find_scenario)
+        if self.content is not None:
+            self._speculation_content = self.content.snapshot
+        if self._client is None:
+            preconnect()
+        return self._speculation.update(partial_message)
+
+    def _start_turn(self, user_message: str):
+        """Reset per-turn bookkeeping and pick up the user's name from the first message"""
+        self._turn_started = time.perf_counter()
+        if self.content is not None:
+            self._turn_content = self.content.snapshot
+            if self._speculation is not None and self._speculation_content is not self._turn_content:
+                self._speculation.reset()  # looked up in content that has been reloaded since
+        self.stage_timings = {}
+        self.last_route = None
+        self.turn_usage = None
+        if self.persona.name_every and self.user_name is None and not self.session_started:
+            extracted_name = self._extract_user_name(user_message)
+            if extracted_name:
+                self.user_name = extracted_name
+
+    def _route_safety_and_scenario(self, user_message: str):
+        """
+        Run the routing stages (safety and database by default) in order.
+        Returns the first response a stage produced, otherwise None
+        (the caller then runs the creative stage).
+        """
+        self._start_turn(user_message)
+        response = None
+        for stage in self.routing_stages:
+            started = time.perf_counter()
+            response = stage.handle(self, user_message)
+            self.stage_timings[stage.name] = time.perf_counter() - started
+            if response is not None:
+                self.last_route = self.last_route or stage.name
+                break
+        else:
+            self.last_route = self.creative_stage.name
+        if self._speculation is not None:
+            self._speculation.reset()
+        return response
+
+    def _end_turn(self):
+        """Record the whole-turn time and hand the turn to TURN_METRICS (if enabled)"""
+        self._turn_content = None
+        self.stage_timings["turn"] = time.perf_counter() - self._turn_started
+        if TURN_METRICS.enabled:
+            TURN_METRICS.record_turn(self.persona.key, self.last_route, dict(self.stage_timings),
+                                     self.turn_usage, self.session_id)
+
+    def _timed_stream(self, deltas):
+        """Pass deltas through, recording the creative stage time once the stream ends"""
+        started = time.perf_counter()
+        try:
+            yield from deltas
+        finally:
+            self.stage_timings[self.creative_stage.name] = time.perf_counter() - started
+            self._end_turn()
+
+    def get_response(self, user_message: str) -> str:
+        """
+        Main routing function: checks safety first, then database, then generates creative response
+        Priority: Safety > Database > Creative
+        """
+        routed_response = self._route_safety_and_scenario(user_message)
+        if routed_response is not None:
+            self._end_turn()
+            return routed_response
+
+        started = time.perf_counter()
+        response = self.creative_stage.handle(self, user_message)
+        self.stage_timings[self.creative_stage.name] = time.perf_counter() - started
+        self._end_turn()
+        return response
+
+    async def get_response_async(self, user_message: str) -> str:
+        """
+        Async version of get_response for serving many sessions from one event loop.
+        Safety and database routing are shared with get_response; only the
+        creative stage awaits the network.
+        """
+        routed_response = self._route_safety_and_scenario(user_message)
+        if routed_response is not None:
+            self._end_turn()
+            return routed_response
+
+        started = time.perf_counter()
+        response = await self.creative_stage.handle_async(self, user_message)
+        self.stage_timings[self.creative_stage.name] = time.perf_counter() - started
+        self._end_turn()
+        return response
+
+    def stream_response(self, user_message: str):
+        """
+        Same routing as get_response, but a creative response is returned as a
+        generator of text deltas. Safety (dict/str) and database (str) responses
+        are returned unchanged since they are available immediately.
+        """
+        routed_response = self._route_safety_and_scenario(user_message)
+        if routed_response is not None:
+            self._end_turn()
+            return routed_response
+
+        return self._timed_stream(self.creative_stage.stream(self, user_message))
+
+    # ===== BATCH CLASSIFICATION =====
+    def classify_batch(self, messages: list, workers: int = None,
+                       chunk_size: int = DEFAULT_CHUNK_SIZE) -> BatchClassification:
+        """
+        Zone, matched keyword, scenario and similarity for every message, as
+        columns (see batch_routing.py), plus the route a fresh session would
+        take. Uses this coach's scenario index and semantic router on up to
+        `workers` processes; never touches session state or the network.
+        """
+        result = classify_messages(messages, self.scenario_index, self.semantic_router, workers, chunk_size)
+        result.route = [
+            zone if zone in ('red', 'amber')
+            else 'scenario' if scenario_key and self.get_exact_response(scenario_key)
+            else self.creative_stage.name
+            for zone, scenario_key in zip(result.zone, result.scenario)
+        ]
+        return result
+
+    # ===== SESSION =====
+    def get_conversation_history(self) -> list:
+        """Return full conversation history"""
+        return self.conversation_history
+
+    def is_session_terminated(self) -> bool:
+        """Check if session has been terminated due to RED ZONE trigger"""
+        return self.red_zone_triggered
+
+    def reset_conversation(self):
+        """Clear conversation history for new session"""
+        user_name = self.user_name
+        self.session.clear()
+        self.context.clear()
+        if self.session_memory:
+            self.session_memory.reset()
+        self.session_started = False
+        self.red_zone_triggered = False
+        self.response_count = 0  # Reset response counter
+        # Note: Keep user_name - user doesn't change between sessions
+        self.user_name = user_name
+
+
+def create_coach(coach_key: str, scenario_responses: dict, **kwargs) -> BaseCoach:
+    """Build a coach straight from its COACH_PERSONAS entry (system prompt included)"""
+    persona = COACH_PERSONAS[coach_key]
+    return BaseCoach(persona.system_prompt, scenario_responses, persona=persona, **kwargs)
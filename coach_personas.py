@@ -0,0 +1,93 @@
+"""
+Coach Personas - Everything that differs between coaches, as data
+The shared engine (coach_engine.py) reads these; adding a coach means adding an entry here
+System prompts are loaded from their modules the first time a coach needs them
+"""
+
+import importlib
+
+# system_prompt values starting with this name a module attribute instead of holding the text
+PROMPT_REFERENCE = "import:"
+
+# ===== SHARED SAFETY TEXTS =====
+RED_ZONE_CARE_MESSAGE = "You deserve real care and support. Please reach out to someone now. You matter very much."
+RED_ZONE_STOP_MESSAGE = "Let us please stop here so you can focus on getting the support you need. You're not alone."
+FALLBACK_MESSAGE = "I apologize, but I'm having trouble responding right now. Could you please try again?"
+TERMINATION_WARNING = "I'm so sorry but this goes beyond coaching. I can't keep talking to you, because this would play down the gravity of your situation. That's why I'll stop here so you can focus on getting the support you need. But you're not alone, you have my full support on this. I believe in you. Please reach out."
+
+
+class CoachPersona:
+    """
+    Static description of one coach.
+
+    key              - id used in SCENARIO_RESPONSES, cache keys and session ids
+    system_prompt    - the prompt text, or "import:module:ATTRIBUTE" (imported on first access)
+    red_initial      - first red zone message; "{name_part}" becomes ", <name>" once the user's name is known
+    fallback_message - reply when OpenAI is unavailable and no scenario is close enough
+    name_every       - address the user by name every N responses (0 = never)
+    """
+
+    def __init__(self, key: str, name: str, system_prompt: str, red_initial: str, amber_message: str,
+                 care_message: str = RED_ZONE_CARE_MESSAGE, stop_message: str = RED_ZONE_STOP_MESSAGE,
+                 termination_warning: str = TERMINATION_WARNING, fallback_message: str = FALLBACK_MESSAGE,
+                 name_every: int = 0, model: str = "gpt-4o-mini", temperature: float = 0.5, max_tokens: int = 200):
+        self.key = key
+        self.name = name
+        self._system_prompt = system_prompt
+        self.red_initial = red_initial
+        self.amber_message = amber_message
+        self.care_message = care_message
+        self.stop_message = stop_message
+        self.termination_warning = termination_warning
+        self.fallback_message = fallback_message
+        self.name_every = name_every
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+
+    @property
+    def system_prompt(self) -> str:
+        if self._system_prompt.startswith(PROMPT_REFERENCE):
+            module_name, _, attribute = self._system_prompt[len(PROMPT_REFERENCE):].partition(":")
+            self._system_prompt = getattr(importlib.import_module(module_name), attribute)
+        return self._system_prompt
+
+    def __repr__(self):
+        return f"CoachPersona({self.key!r})"
+
+
+# ===== COACHES =====
+ANNE_PERSONA = CoachPersona(
+    key="anne",
+    name="Dr. Anne Rosental",
+    system_prompt=PROMPT_REFERENCE + "Anne_Rosental_prompt:ANNE_SYSTEM_PROMPT",
+    red_initial="""Oh{name_part}, I'm really worried about you. I'm so sorry that you're going through this — what you're describing sounds incredibly painful.
+
+Please know that you don't have to face this alone. If you're in Germany, please contact TelefonSeelsorge at 0800 111 0 111 (24 hours, free, confidential). If you're outside Germany, you can find international helplines here: findahelpline.com, or call your local emergency number.""",
+    amber_message="""I can hear how empty and exhausted this feels for you right now. It sounds like you've been carrying a lot on your own, and that can be so isolating.
+
+Even though it may not feel urgent, this is still something that deserves gentle care. Sometimes talking with a therapist or counselor can help you find new lightness — you don't have to do it alone.
+
+If you'd like to talk to someone, you can reach out to TelefonSeelsorge at 0800 111 0 111 (free, 24/7 in Germany), or visit findahelpline.com for other options in your country.
+
+Let's take this as a reminder that your feelings matter and that help is available.""",
+    name_every=6
+)
+
+HIRO_PERSONA = CoachPersona(
+    key="hiro",
+    name="Hiro Lin",
+    system_prompt=PROMPT_REFERENCE + "Hiro_Lin_prompt:HIRO_SYSTEM_PROMPT",
+    red_initial="""Hey, I can tell this situation feels really heavy — and I take that seriously. I'm worried about you, and from what you're describing, this goes beyond what I can safely support you with here.
+
+Please connect with professional help immediately. If you're in Germany, please contact TelefonSeelsorge at 0800 111 0 111 (free, 24/7, confidential). If you're in another country, visit findahelpline.com for local numbers, or call your local emergency service.""",
+    amber_message="""I can tell you're running on empty right now — that kind of exhaustion can sneak up on anyone. It's a sign that you've been pushing too hard for too long.
+
+You don't have to wait until things get worse to ask for help. Talking with a professional can give you the tools and space to recharge before this turns into something heavier.
+
+If you're in Germany, you can contact TelefonSeelsorge at 0800 111 0 111 (free, 24/7), or check findahelpline.com for other options in your region.
+
+It's a smart move to get extra support early — that's what resilience really means."""
+)
+
+COACH_PERSONAS = {persona.key: persona for persona in (ANNE_PERSONA, HIRO_PERSONA)}
@@ -0,0 +1,579 @@
+"""
+Coach Server - Headless multi-process chat backend (JSON over HTTP + WebSocket streaming)
+The front process speaks HTTP on asyncio; each session id is pinned to one of N worker
+processes running the routing pipeline, with session state in the shared session store
+Run:  python coach_server.py --port 8080 --workers 4   (SESSION_DB_PATH shares state across workers,
+      CONTENT_DB_PATH serves hot-reloaded content from a file, see content_store.py)
+
+HTTP API (JSON bodies; session_id is created when omitted):
+  POST /v1/chat     {"session_id", "coach", "message"} -> {"session_id", "coach", "route", "response", "terminated"}
+                    (after a red zone: route "terminated" and the termination warning, unless the
+                    message asks about professional help)
+  POST /v1/prepare  {"session_id", "coach", "text"}    -> {"zone"}  (partial input while typing)
+  POST /v1/reset    {"session_id", "coach"}            -> {"ok": true}
+  GET  /v1/history?session_id=...&coach=...            -> {"messages": [...]}
+  GET  /healthz, GET /metrics (Prometheus text from every worker)
+WebSocket /v1/ws: send {"type": "chat" | "prepare", ...same fields}; a chat streams
+{"type": "delta", "text"} frames and ends with {"type": "done", ...same fields as /v1/chat}.
+A red zone response is the coach's dict plus "follow_up_delay" (seconds between its messages).
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import uuid
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing
+from urllib.parse import parse_qs, urlsplit
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger("coach.server")
+
+# ===== DEFAULTS (overridable through the environment) =====
+WORKERS = int(os.getenv("COACH_SERVER_WORKERS", str(os.cpu_count() or 1)))
+WORKER_THREADS = int(os.getenv("COACH_SERVER_THREADS", "32"))  # concurrent turns per worker
+MAX_SESSIONS = int(os.getenv("COACH_SERVER_MAX_SESSIONS", "1000"))  # coach instances kept per worker
+MAX_BODY_BYTES = 64 * 1024
+COACH_KEYS = ("anne", "hiro")
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+class RequestError(Exception):
+    """Client error: reported with an HTTP status (or a WebSocket error frame)"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+# ===== WORKER PROCESS =====
+class _SessionSlot:
+    __slots__ = ('coach', 'lock')
+
+    def __init__(self, coach):
+        self.coach = coach
+        self.lock = threading.Lock()
+
+
+class CoachWorker:
+    """
+    Runs inside one worker process: the coaches of the sessions pinned to it.
+
+    Requests arrive over a pipe and run on a thread pool (creative turns
+    mostly wait on the network); turns of the same session are serialized.
+    Coach instances are an LRU cache over the session store, so an evicted
+    or restarted session resumes from the store on its next request.
+    """
+
+    def __init__(self, conn, threads: int = WORKER_THREADS, max_sessions: int = MAX_SESSIONS):
+        from content_store import get_content_store
+        from session_store import InMemorySessionStore, create_session_store
+
+        self.conn = conn
+        self.content = get_content_store()  # this worker's own hot-reloaded copy of CONTENT_DB_PATH
+        # Without SESSION_DB_PATH, sessions live in this worker only (pinning keeps them reachable)
+        self.store = create_session_store() or InMemorySessionStore()
+        self.max_sessions = max_sessions
+        self.slots = OrderedDict()  # (session_id, coach_key) -> _SessionSlot
+        self._slots_lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(threads, thread_name_prefix="coach-worker")
+
+    def send(self, request_id: int, kind: str, data):
+        with self._send_lock:
+            self.conn.send((request_id, kind, data))
+
+    def serve(self):
+        while True:
+            try:
+                request_id, op, payload = self.conn.recv()
+            except (EOFError, OSError):
+                break
+            if op == "stop":
+                break
+            self.pool.submit(self._handle, request_id, op, payload)
+        self.pool.shutdown(wait=True)
+        self.store.flush()
+
+    def _slot(self, session_id: str, coach_key: str) -> _SessionSlot:
+        from coach_engine import create_coach
+
+        key = (session_id, coach_key)
+        with self._slots_lock:
+            slot = self.slots.get(key)
+            if slot is None:
+                coach = create_coach(coach_key, self.content, session_store=self.store,
+                                     session_id=f"{session_id}-{coach_key}")
+                slot = self.slots[key] = _SessionSlot(coach)
+                self._evict()
+            else:
+                self.slots.move_to_end(key)
+            return slot
+
+    def _evict(self):
+        """Drop least recently used coaches over max_sessions (never one that is mid-turn)"""
+        excess = len(self.slots) - self.max_sessions
+        for key in list(itertools.islice(self.slots, max(excess, 0) * 2)):
+            if excess <= 0:
+                break
+            if not self.slots[key].lock.locked():
+                del self.slots[key]
+                excess -= 1
+
+    def _handle(self, request_id: int, op: str, payload: dict):
+        try:
+            if op == "metrics":
+                from turn_metrics import TURN_METRICS
+                self.send(request_id, "result", TURN_METRICS.prometheus_text())
+                return
+            slot = self._slot(payload["session_id"], payload["coach"])
+            if op == "prepare":
+                # Typing updates never wait behind a running turn; they are only a head start
+                if not slot.lock.acquire(blocking=False):
+                    self.send(request_id, "result", {"zone": None, "busy": True})
+                    return
+                try:
+                    self.send(request_id, "result", {"zone": slot.coach.prepare(payload["text"])})
+                finally:
+                    slot.lock.release()
+                return
+            with slot.lock:
+                if op == "chat":
+                    result = self._chat(request_id, slot.coach, payload["message"], payload.get("stream", False))
+                elif op == "history":
+                    result = {"messages": [message.as_dict() for message in slot.coach.get_conversation_history()]}
+                elif op == "reset":
+                    slot.coach.reset_conversation()
+                    result = {"ok": True}
+                else:
+                    self.send(request_id, "error", (400, f"unknown operation {op!r}"))
+                    return
+            # Replied after the session lock is free, so the client's next request never finds it busy
+            self.send(request_id, "result", result)
+        except Exception as e:
+            logger.exception("Worker request %s failed", op)
+            self.send(request_id, "error", (500, f"{type(e).__name__}: {e}"))
+
+    def _chat(self, request_id: int, coach, message: str, stream: bool) -> dict:
+        """Run one turn (sending text deltas as they arrive when streaming); returns the result"""
+        from delivery_scheduler import RED_ZONE_FOLLOW_UP_DELAY
+
+        if coach.is_session_terminated() and not coach.is_asking_about_professional_help(message):
+            # Coaching stopped at the red zone (as in the Streamlit and CLI apps): no scenario or LLM turn
+            warning = coach.get_termination_warning()
+            coach.add_message("user", message)
+            coach.add_message("assistant", warning)
+            return {"route": "terminated", "response": warning, "terminated": True}
+        if stream:
+            response = coach.stream_response(message)
+            if not isinstance(response, (str, dict)):
+                parts = []
+                for delta in response:
+                    parts.append(delta)
+                    self.send(request_id, "delta", delta)
+                response = "".join(parts)
+        else:
+            response = coach.get_response(message)
+        if isinstance(response, dict):
+            response = {**response, "follow_up_delay": RED_ZONE_FOLLOW_UP_DELAY}
+        return {"route": coach.last_route, "response": response, "terminated": coach.is_session_terminated()}
+
+
+def _split_rate_limits(workers: int):
+    """The OpenAI RPM/TPM limits are per organization: give each worker its share"""
+    for name in ("OPENAI_RPM_LIMIT", "OPENAI_TPM_LIMIT"):
+        limit = int(os.getenv(name, "0"))
+        if limit:
+            os.environ[name] = str(max(limit // workers, 1))
+
+
+def _worker_main(conn, workers: int, threads: int, max_sessions: int):
+    """Entry point of a worker process"""
+    _split_rate_limits(workers)  # before rate_limiter.py reads the environment
+    logging.basicConfig(level=logging.INFO)
+    CoachWorker(conn, threads, max_sessions).serve()
+
+
+# ===== WORKER POOL (front process) =====
+class WorkerPool:
+    """
+    Worker processes plus the routing of requests to them.
+
+    A session id always maps to the same worker (CRC32 modulo the pool size),
+    so its coach instance and any in-memory state stay in one process. One
+    reader thread per worker hands replies to the event loop. A worker that
+    dies is restarted; its in-flight requests fail with 503.
+    """
+
+    def __init__(self, workers: int = WORKERS, threads: int = WORKER_THREADS, max_sessions: int = MAX_SESSIONS):
+        self.size = workers
+        self.threads = threads
+        self.max_sessions = max_sessions
+        self._context = multiprocessing.get_context("spawn")  # no event loop or threads inherited
+        self._ids = itertools.count()
+        self._pending = {}  # request id -> (worker index, asyncio.Queue)
+        self._procs = [None] * workers
+        self._conns = [None] * workers
+        self._send_locks = [threading.Lock() for _ in range(workers)]
+        self._closing = False
+        self.loop = None
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        for index in range(self.size):
+            self._spawn(index)
+        return self
+
+    def _spawn(self, index: int):
+        parent_conn, child_conn = self._context.Pipe()
+        proc = self._context.Process(target=_worker_main, name=f"coach-worker-{index}", daemon=True,
+                                     args=(child_conn, self.size, self.threads, self.max_sessions))
+        proc.start()
+        child_conn.close()
+        self._procs[index], self._conns[index] = proc, parent_conn
+        threading.Thread(target=self._read, args=(index, parent_conn), name=f"coach-pool-reader-{index}",
+                         daemon=True).start()
+
+    def _read(self, index: int, conn):
+        while True:
+            try:
+                request_id, kind, data = conn.recv()
+            except (EOFError, OSError):
+                break
+            entry = self._pending.get(request_id)
+            if entry is not None:
+                self.loop.call_soon_threadsafe(entry[1].put_nowait, (kind, data))
+        if self._closing:
+            return
+        logger.error("Coach worker %d exited; restarting", index)
+        for request_id, (worker, replies) in list(self._pending.items()):
+            if worker == index:
+                self.loop.call_soon_threadsafe(replies.put_nowait, ("error", (503, "worker restarted")))
+        self._spawn(index)
+
+    def worker_for(self, session_id: str) -> int:
+        return zlib.crc32(session_id.encode("utf-8")) % self.size
+
+    async def stream(self, op: str, payload: dict, worker: int = None):
+        """
+        Send one request; yields (kind, data) replies until the final result or error.
+        Consume it inside `async with aclosing(...)` so the pending entry is removed
+        as soon as the caller stops, not when the generator is garbage collected.
+        """
+        worker = self.worker_for(payload["session_id"]) if worker is None else worker
+        request_id = next(self._ids)
+        replies = asyncio.Queue()
+        self._pending[request_id] = (worker, replies)
+        try:
+            with self._send_locks[worker]:
+                self._conns[worker].send((request_id, op, payload))
+            while True:
+                kind, data = await replies.get()
+                yield kind, data
+                if kind != "delta":
+                    return
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def call(self, op: str, payload: dict, worker: int = None):
+        """Send one request and return its result (raises RequestError on a worker error)"""
+        async with aclosing(self.stream(op, payload, worker)) as replies:
+            async for kind, data in replies:
+                if kind == "error":
+                    raise RequestError(*data)
+                if kind == "result":
+                    return data
+
+    def close(self):
+        self._closing = True
+        for index, conn in enumerate(self._conns):
+            try:
+                with self._send_locks[index]:
+                    conn.send((None, "stop", None))
+            except (OSError, ValueError):
+                pass
+        for proc in self._procs:
+            proc.join(timeout=10)
+
+
+def merge_prometheus(texts: list, label: str = "worker") -> str:
+    """
+    Combine the metrics of several processes into one exposition: each sample
+    gets label="<index>", and each metric family keeps one HELP/TYPE header
+    """
+    families = OrderedDict()  # name -> [header lines, sample lines]
+    for index, text in enumerate(texts):
+        current = None
+        for line in text.splitlines():
+            if line.startswith("# "):
+                parts = line.split(" ", 3)
+                current = families.setdefault(parts[2], [[], []])
+                if line not in current[0]:
+                    current[0].append(line)
+            elif line.strip():
+                if current is None:
+                    current = families.setdefault(line.split("{", 1)[0].split(" ", 1)[0], [[], []])
+                name, sep, rest = line.partition("{")
+                if sep:
+                    current[1].append(f'{name}{{{label}="{index}",{rest}')
+                else:
+                    name, _, value = line.partition(" ")
+                    current[1].append(f'{name}{{{label}="{index}"}} {value}')
+    lines = []
+    for headers, samples in families.values():
+        lines += headers + samples
+    return "\n".join(lines) + "\n"
+
+
+# ===== HTTP / WEBSOCKET FRONT END =====
+def _chat_request(body: dict) -> dict:
+    """Validate a chat/prepare/reset body; fills in a new session id when missing"""
+    coach = body.get("coach")
+    if coach not in COACH_KEYS:
+        raise RequestError(400, f"coach must be one of {', '.join(COACH_KEYS)}")
+    session_id = body.get("session_id") or uuid.uuid4().hex
+    if not isinstance(session_id, str) or len(session_id) > 128:
+        raise RequestError(400, "invalid session_id")
+    return {**body, "session_id": session_id, "coach": coach}
+
+
+def _require_text(body: dict, field: str) -> str:
+    value = body.get(field)
+    if not isinstance(value, str) or not value.strip():
+        raise RequestError(400, f"'{field}' must be a non-empty string")
+    return value
+
+
+class CoachServer:
+    """HTTP/1.1 (keep-alive) and WebSocket server on asyncio streams, forwarding to a WorkerPool"""
+
+    def __init__(self, pool: WorkerPool):
+        self.pool = pool
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except RequestError as e:
+                    # The body was not read, so the connection cannot be reused
+                    status, content_type, payload = self._json(e.status, {"error": str(e)})
+                    self._write_response(writer, status, content_type, payload, keep_alive=False)
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, target, headers, body = request
+                if headers.get("upgrade", "").lower() == "websocket":
+                    await self._websocket(reader, writer, headers)
+                    break
+                status, content_type, payload = await self._dispatch(method, target, body)
+                self._write_response(writer, status, content_type, payload,
+                                     keep_alive=headers.get("connection", "").lower() != "close")
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, _ = line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            return None
+        headers = {}
+        while True:
+            header = await reader.readline()
+            if header in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = header.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = headers.get("content-length", "0") or "0"
+        if not (length.isascii() and length.isdigit()):
+            raise RequestError(400, "invalid Content-Length")
+        length = int(length)
+        if length > MAX_BODY_BYTES:
+            raise RequestError(413, f"body larger than {MAX_BODY_BYTES} bytes")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target, headers, body
+
+    @staticmethod
+    def _write_response(writer, status: int, content_type: str, payload: bytes, keep_alive: bool = True):
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                  413: "Payload Too Large",
+                  500: "Internal Server Error", 503: "Service Unavailable"}.get(status, "Error")
+        writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: {content_type}\r\n"
+                     f"Content-Length: {len(payload)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                     f"\r\n".encode("latin-1") + payload)
+
+    async def _dispatch(self, method: str, target: str, body: bytes) -> tuple:
+        """Returns (status, content type, payload bytes)"""
+        url = urlsplit(target)
+        try:
+            if url.path == "/metrics" and method == "GET":
+                texts = await asyncio.gather(*(self.pool.call("metrics", {}, worker=index)
+                                               for index in range(self.pool.size)))
+                return 200, "text/plain; version=0.0.4", merge_prometheus(texts).encode("utf-8")
+            if url.path == "/healthz" and method == "GET":
+                return self._json(200, {"ok": True, "workers": self.pool.size})
+            if url.path == "/v1/history" and method == "GET":
+                query = {key: values[0] for key, values in parse_qs(url.query).items()}
+                if not query.get("session_id"):
+                    raise RequestError(400, "session_id is required")
+                return self._json(200, await self.pool.call("history", _chat_request(query)))
+            if url.path in ("/v1/chat", "/v1/prepare", "/v1/reset"):
+                if method != "POST":
+                    raise RequestError(405, "use POST")
+                return self._json(200, await self._post(url.path.rsplit("/", 1)[1], self._parse_json(body)))
+            raise RequestError(404, "not found")
+        except RequestError as e:
+            return self._json(e.status, {"error": str(e)})
+
+    @staticmethod
+    def _json(status: int, data: dict) -> tuple:
+        return status, "application/json", json.dumps(data).encode("utf-8")
+
+    @staticmethod
+    def _parse_json(body: bytes) -> dict:
+        try:
+            data = json.loads(body or b"{}")
+        except ValueError:
+            raise RequestError(400, "body must be JSON")
+        if not isinstance(data, dict):
+            raise RequestError(400, "body must be a JSON object")
+        return data
+
+    async def _post(self, op: str, body: dict) -> dict:
+        request = _chat_request(body)
+        if op == "chat":
+            request["message"] = _require_text(body, "message")
+        elif op == "prepare":
+            if not isinstance(body.get("text"), str):
+                raise RequestError(400, "'text' must be a string")
+        result = await self.pool.call(op, request)
+        return {"session_id": request["session_id"], "coach": request["coach"], **result}
+
+    # ===== WEBSOCKET =====
+    async def _websocket(self, reader, writer, headers: dict):
+        key = headers.get("sec-websocket-key")
+        if not key:
+            self._write_response(writer, 400, "text/plain", b"missing Sec-WebSocket-Key", keep_alive=False)
+            return
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode("ascii")).digest()).decode("ascii")
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode("ascii"))
+        await writer.drain()
+        while True:
+            opcode, data = await _read_frame(reader)
+            if opcode == 0x8:  # close
+                writer.write(_frame(0x8, data[:2]))
+                await writer.drain()
+                return
+            if opcode == 0x9:  # ping
+                writer.write(_frame(0xA, data))
+            elif opcode == 0x1:
+                await self._websocket_message(writer, data)
+            await writer.drain()
+
+    async def _websocket_message(self, writer, data: bytes):
+        def send(message: dict):
+            writer.write(_frame(0x1, json.dumps(message).encode("utf-8")))
+
+        try:
+            body = self._parse_json(data)
+            op = body.get("type")
+            if op == "prepare":
+                send({"type": "prepare", **await self._post("prepare", body)})
+                return
+            if op != "chat":
+                raise RequestError(400, "type must be 'chat' or 'prepare'")
+            request = {**_chat_request(body), "message": _require_text(body, "message"), "stream": True}
+            async with aclosing(self.pool.stream("chat", request)) as replies:
+                async for kind, reply in replies:
+                    if kind == "delta":
+                        send({"type": "delta", "text": reply})
+                        await writer.drain()
+                    elif kind == "error":
+                        raise RequestError(*reply)
+                    else:
+                        send({"type": "done", "session_id": request["session_id"], "coach": request["coach"],
+                              **reply})
+        except RequestError as e:
+            send({"type": "error", "status": e.status, "error": str(e)})
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> tuple:
+    """One (unfragmented) client frame: (opcode, unmasked payload)"""
+    head = await reader.readexactly(2)
+    opcode, length = head[0] & 0x0F, head[1] & 0x7F
+    if length == 126:
+        length = int.from_bytes(await reader.readexactly(2), "big")
+    elif length == 127:
+        length = int.from_bytes(await reader.readexactly(8), "big")
+    if length > MAX_BODY_BYTES:
+        raise ConnectionError("WebSocket frame too large")
+    mask = await reader.readexactly(4) if head[1] & 0x80 else None
+    payload = await reader.readexactly(length)
+    if mask:
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    return opcode, payload
+
+
+def _frame(opcode: int, payload: bytes) -> bytes:
+    """One final, unmasked server frame"""
+    length = len(payload)
+    if length < 126:
+        header = bytes((0x80 | opcode, length))
+    elif length < 1 << 16:
+        header = bytes((0x80 | opcode, 126)) + length.to_bytes(2, "big")
+    else:
+        header = bytes((0x80 | opcode, 127)) + length.to_bytes(8, "big")
+    return header + payload
+
+
+async def serve(host: str, port: int, workers: int, threads: int, max_sessions: int):
+    pool = WorkerPool(workers, threads, max_sessions).start(asyncio.get_running_loop())
+    server = await asyncio.start_server(CoachServer(pool).handle_connection, host, port)
+    logger.info("Coach server on http://%s:%d with %d workers", host, port, workers)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--threads", type=int, default=WORKER_THREADS, help="concurrent turns per worker")
+    parser.add_argument("--max-sessions", type=int, default=MAX_SESSIONS, help="coach instances cached per worker")
+    args = parser.parse_args()
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.threads, args.max_sessions))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
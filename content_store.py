@@ -0,0 +1,245 @@
+"""
+Content Store - Conversation starters and scenario responses served from a SQLite file
+Editing content no longer needs a deploy: every process reads the same file (read-only),
+watches it for changes, and reloads its own copy (scenario indexes included) on a background
+thread; turns keep using the previous snapshot until the new one is swapped in whole
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from scenario_index import ScenarioIndex, get_scenario_index
+
+logger = logging.getLogger("coach.content")
+
+SCHEMA_VERSION = 2  # 2: starters.category_position keeps the category order
+RELOAD_INTERVAL = float(os.getenv("CONTENT_RELOAD_INTERVAL", "2.0"))  # seconds between file checks
+MMAP_SIZE = 64 * 1024 * 1024  # loads read file pages straight from the OS page cache
+
+_EMPTY_INDEX = ScenarioIndex({})
+
+
+class ContentSnapshot:
+    """
+    One immutable version of the content: starters and scenarios in the shape of
+    conversation_database.py, plus a ScenarioIndex per coach built from them
+    """
+    __slots__ = ("version", "starters", "scenarios", "indexes")
+
+    def __init__(self, version, starters: dict, scenarios: dict, indexes: dict = None):
+        self.version = version
+        self.starters = starters
+        self.scenarios = scenarios
+        self.indexes = indexes if indexes is not None else {
+            coach: ScenarioIndex(coach_scenarios) for coach, coach_scenarios in scenarios.items()}
+
+    def index(self, coach_key: str) -> ScenarioIndex:
+        return self.indexes.get(coach_key, _EMPTY_INDEX)
+
+
+# ===== FILE FORMAT =====
+def write_content_db(path: str, starters: dict, scenarios: dict) -> str:
+    """
+    Write starters and scenarios to a new SQLite file and move it over `path`
+    in one rename, so readers see either the old or the new content
+    """
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript(f"""
+            PRAGMA user_version = {SCHEMA_VERSION};
+            CREATE TABLE starters (
+                coach TEXT NOT NULL,
+                category TEXT NOT NULL,
+                category_position INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                PRIMARY KEY (coach, category, position)
+            );
+            CREATE TABLE scenarios (
+                coach TEXT NOT NULL,
+                scenario_key TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (coach, scenario_key)
+            );
+        """)
+        conn.executemany("INSERT INTO starters VALUES (?, ?, ?, ?, ?)", [
+            (coach, category, category_position, position, text)
+            for coach, categories in starters.items()
+            for category_position, (category, texts) in enumerate(categories.items())
+            for position, text in enumerate(texts)])
+        conn.executemany("INSERT INTO scenarios VALUES (?, ?, ?, ?)", [
+            (coach, scenario_key, position, json.dumps(data, ensure_ascii=False))
+            for coach, coach_scenarios in scenarios.items()
+            for position, (scenario_key, data) in enumerate(coach_scenarios.items())])
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_content_db(path: str) -> tuple:
+    """(starters, scenarios) from a content file, in their original order"""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            raise ValueError(f"{path}: content schema {version}, expected {SCHEMA_VERSION}")
+        conn.execute("BEGIN")  # one consistent read even if the file is edited in place
+        starters, scenarios = {}, {}
+        for coach, category, text in conn.execute(
+                "SELECT coach, category, text FROM starters ORDER BY coach, category_position, position"):
+            starters.setdefault(coach, {}).setdefault(category, []).append(text)
+        for coach, scenario_key, data in conn.execute(
+                "SELECT coach, scenario_key, data FROM scenarios ORDER BY coach, position"):
+            scenarios.setdefault(coach, {})[scenario_key] = json.loads(data)
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+    return starters, scenarios
+
+
+def _file_signature(path: str):
+    """Changes whenever the file is replaced or written to"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+# ===== STORE =====
+class ContentStore:
+    """
+    Current content for a process.
+
+    snapshot is replaced as a whole, so a reader always sees starters,
+    scenarios and indexes of the same version without taking a lock. A
+    file-backed store (path given) checks the file every reload_interval
+    seconds on a daemon thread; a change is loaded and indexed on that thread
+    and only then swapped in. A file that fails to load keeps the previous
+    snapshot. from_dicts() wraps in-code content (no file, never reloads).
+    Only the file is shared between processes: each process deserializes the
+    content into its own dicts and builds its own indexes.
+    """
+
+    def __init__(self, path: str = None, reload_interval: float = RELOAD_INTERVAL, snapshot: ContentSnapshot = None):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+        self._failed_version = None  # signature of a file that did not load; retried once it changes
+        self.reloads = 0
+        if snapshot is not None:
+            self.snapshot = snapshot
+            return
+
+        signature = _file_signature(path)
+        self.snapshot = ContentSnapshot(signature, *read_content_db(path))
+        if reload_interval > 0:
+            self._watcher = threading.Thread(target=self._watch, name="content-store-watch", daemon=True)
+            self._watcher.start()
+
+    @classmethod
+    def from_dicts(cls, starters: dict, scenarios: dict) -> "ContentStore":
+        """Static store over in-memory dicts (indexes shared through get_scenario_index)"""
+        indexes = {coach: get_scenario_index(coach_scenarios) for coach, coach_scenarios in scenarios.items()}
+        return cls(snapshot=ContentSnapshot("builtin", starters, scenarios, indexes))
+
+    # ===== READS (lock-free) =====
+    @property
+    def conversation_starters(self) -> dict:
+        return self.snapshot.starters
+
+    @property
+    def scenario_responses(self) -> dict:
+        return self.snapshot.scenarios
+
+    def scenarios_for(self, coach_key: str) -> dict:
+        return self.snapshot.scenarios.get(coach_key, {})
+
+    def index_for(self, coach_key: str) -> ScenarioIndex:
+        return self.snapshot.index(coach_key)
+
+    # ===== RELOAD =====
+    def reload(self, force: bool = False) -> bool:
+        """Load the file if it changed since the current snapshot; True if a new snapshot was swapped in"""
+        if self.path is None:
+            return False
+        with self._reload_lock:
+            signature = _file_signature(self.path)
+            if signature is None or (signature in (self.snapshot.version, self._failed_version) and not force):
+                return False
+            start = time.perf_counter()
+            try:
+                snapshot = ContentSnapshot(signature, *read_content_db(self.path))
+            except Exception:
+                self._failed_version = signature
+                raise
+            self.snapshot = snapshot
+            self.reloads += 1
+        logger.info("Reloaded content from %s in %.1f ms", self.path, (time.perf_counter() - start) * 1000)
+        return True
+
+    def _watch(self):
+        while not self._stop.wait(self.reload_interval):
+            try:
+                self.reload()
+            except (sqlite3.Error, ValueError, OSError):
+                logger.exception("Content reload from %s failed; keeping the previous version", self.path)
+
+    def close(self):
+        self._stop.set()
+
+
+_store = None
+_store_pid = None
+_store_lock = threading.Lock()
+
+
+def get_content_store() -> ContentStore:
+    """
+    The process-wide content store: the SQLite file at CONTENT_DB_PATH when set
+    (hot reloaded), otherwise the built-in dicts of conversation_database.py
+    """
+    global _store, _store_pid
+    store = _store
+    if store is not None and _store_pid == os.getpid():
+        return store
+    with _store_lock:
+        if _store is None or _store_pid != os.getpid():
+            path = os.getenv("CONTENT_DB_PATH")
+            if path:
+                _store = ContentStore(path)
+            else:
+                from conversation_database import CONVERSATION_STARTERS, SCENARIO_RESPONSES
+                _store = ContentStore.from_dicts(CONVERSATION_STARTERS, SCENARIO_RESPONSES)
+            _store_pid = os.getpid()
+        return _store
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Write the content file read through CONTENT_DB_PATH")
+    parser.add_argument("path", help="content file to (re)write; running processes pick it up")
+    parser.add_argument("--json", help='JSON file {"conversation_starters": ..., "scenario_responses": ...} '
+                                       "(default: the dicts in conversation_database.py)")
+    args = parser.parse_args()
+    if args.json:
+        with open(args.json, encoding="utf-8") as f:
+            content = json.load(f)
+        starters, scenarios = content["conversation_starters"], content["scenario_responses"]
+    else:
+        from conversation_database import CONVERSATION_STARTERS as starters, SCENARIO_RESPONSES as scenarios
+    print(f"Saved content to {write_content_db(args.path, starters, scenarios)}")
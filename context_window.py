@@ -0,0 +1,147 @@
+"""
+Context Window - Token-budgeted view of the conversation sent to OpenAI
+Keeps the newest turns within a budget; safety exchanges are pinned and never dropped
+Older turns can be folded into a rolling "session memory" summary (see session_memory.py)
+"""
+
+from collections import deque
+
+# Token budget for conversation history (the system prompt is not counted)
+DEFAULT_CONTEXT_BUDGET = 4000
+
+# Per-message framing tokens added by the chat format (role, separators)
+MESSAGE_OVERHEAD = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap fallback estimator: ~4 characters per token for English text"""
+    return len(text) // 4 + 1
+
+
+def default_token_counter():
+    """
+    Return a text -> token count function.
+    Uses tiktoken when it is installed, otherwise the character estimate.
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        return estimate_tokens
+
+    encoding = tiktoken.get_encoding("o200k_base")
+    return lambda text: len(encoding.encode(text))
+
+
+_default_counter = None
+
+
+def count_tokens_default(text: str) -> int:
+    """
+    default_token_counter(), resolved on the first call instead of at import
+    or coach construction (loading the tiktoken encoding is slow)
+    """
+    global _default_counter
+    if _default_counter is None:
+        _default_counter = default_token_counter()
+    return _default_counter(text)
+
+
+class ContextWindow:
+    """
+    Messages that will be sent with the next completion, with a running token total.
+
+    Each message is counted once when appended. When the total exceeds the
+    budget the oldest unpinned messages are dropped; pinned messages (safety
+    exchanges) and the newest message are always kept, even over budget.
+    Entries carry an increasing sequence number so a summary can replace
+    exactly the messages it covered. The chat completion list is maintained
+    alongside the entries (appends are O(1); only trims and summaries rebuild it).
+    """
+
+    def __init__(self, budget: int = DEFAULT_CONTEXT_BUDGET, count_tokens=None):
+        self.budget = budget
+        self.count_tokens = count_tokens or count_tokens_default
+        self._entries = deque()  # (seq, payload, tokens, pinned); payload = {"role", "content"}
+        self._payload = []  # the payload dicts of _entries, ready to send
+        self._next_seq = 0
+        self.total_tokens = 0
+        self.dropped_messages = 0
+        self.memory = None  # rolling session summary, sent after the system prompt
+        self.memory_tokens = 0
+        self._memory_message = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def append(self, role: str, content: str, pinned: bool = False):
+        """Add a message and trim older unpinned messages if over budget"""
+        payload = {"role": role, "content": content}  # built once, sent every turn it stays in the window
+        tokens = self.count_tokens(content) + MESSAGE_OVERHEAD
+        self._entries.append((self._next_seq, payload, tokens, pinned))
+        self._payload.append(payload)
+        self._next_seq += 1
+        self.total_tokens += tokens
+        if self.total_tokens > self.budget:
+            self._trim()
+
+    def _trim(self):
+        """Drop oldest unpinned messages until within budget"""
+        kept = deque()
+        newest = self._entries.pop()
+        while self._entries:
+            entry = self._entries.popleft()
+            if self.total_tokens > self.budget and not entry[3]:
+                self.total_tokens -= entry[2]
+                self.dropped_messages += 1
+            else:
+                kept.append(entry)
+        kept.append(newest)
+        self._set_entries(kept)
+
+    def _set_entries(self, entries: deque):
+        self._entries = entries
+        self._payload = [entry[1] for entry in entries]
+
+    def messages(self) -> list:
+        """Messages in chat completion format, oldest first (shared list: do not modify)"""
+        return self._payload
+
+    def memory_message(self):
+        """The session memory as a system message, or None if there is none yet"""
+        return self._memory_message
+
+    def summarizable(self, keep_recent: int) -> tuple:
+        """
+        Return (through_seq, [(role, content), ...]) for the unpinned messages
+        older than the newest keep_recent ones; through_seq is None if empty.
+        """
+        older = list(self._entries)[:-keep_recent] if keep_recent else list(self._entries)
+        older = [entry for entry in older if not entry[3]]
+        if not older:
+            return None, []
+        return older[-1][0], [(entry[1]["role"], entry[1]["content"]) for entry in older]
+
+    def apply_summary(self, through_seq: int, summary: str):
+        """Replace unpinned messages up to through_seq with the summary"""
+        kept = deque()
+        for entry in self._entries:
+            if entry[0] <= through_seq and not entry[3]:
+                self.total_tokens -= entry[2]
+            else:
+                kept.append(entry)
+        self._set_entries(kept)
+        self.total_tokens -= self.memory_tokens
+        self.memory = summary
+        self._memory_message = {"role": "system", "content": f"Session memory (earlier in this conversation):\n{summary}"}
+        self.memory_tokens = self.count_tokens(summary) + MESSAGE_OVERHEAD
+        self.total_tokens += self.memory_tokens
+
+    def clear(self):
+        """Forget all messages and the session memory (new session)"""
+        self._entries.clear()
+        self._payload = []
+        self.total_tokens = 0
+        self.dropped_messages = 0
+        self.memory = None
+        self.memory_tokens = 0
+        self._memory_message = None
@@ -0,0 +1,79 @@
+"""
+Delivery Scheduler - Timed follow-up messages without sleeping in the request thread
+Used for the red zone sequence: initial response now, care message +5s, stop message +10s
+"""
+
+import heapq
+import itertools
+import time
+
+# Seconds between the messages of the red zone sequence
+RED_ZONE_FOLLOW_UP_DELAY = 5
+
+
+class ScheduledMessage:
+    """A message to show once `due` (epoch seconds) has passed"""
+    __slots__ = ('due', 'role', 'content')
+
+    def __init__(self, due: float, role: str, content: str):
+        self.due = due
+        self.role = role
+        self.content = content
+
+    def __repr__(self):
+        return f"ScheduledMessage({self.due!r}, {self.role!r}, {self.content[:30]!r})"
+
+
+class DeliveryScheduler:
+    """
+    Queue of messages with due timestamps.
+
+    Nothing here sleeps: UIs poll pop_due() (Streamlit fragment auto-refresh)
+    or wait until next_due() themselves (CLI). Wall-clock timestamps keep the
+    schedule valid across Streamlit reruns.
+    """
+
+    def __init__(self):
+        self._queue = []
+        self._order = itertools.count()  # FIFO for equal due times
+
+    def schedule(self, content: str, delay: float, role: str = "assistant", now: float = None):
+        """Deliver `content` `delay` seconds from now"""
+        due = (time.time() if now is None else now) + delay
+        heapq.heappush(self._queue, (due, next(self._order), ScheduledMessage(due, role, content)))
+
+    def schedule_red_zone(self, response: dict, now: float = None):
+        """Queue care_message and stop_message of a red zone response at the usual pacing"""
+        now = time.time() if now is None else now
+        self.schedule(response["care_message"], RED_ZONE_FOLLOW_UP_DELAY, now=now)
+        self.schedule(response["stop_message"], 2 * RED_ZONE_FOLLOW_UP_DELAY, now=now)
+
+    def pop_due(self, now: float = None) -> list:
+        """Remove and return every message whose time has come, in order"""
+        now = time.time() if now is None else now
+        due = []
+        while self._queue and self._queue[0][0] <= now:
+            due.append(heapq.heappop(self._queue)[2])
+        return due
+
+    def next_due(self):
+        """Due time of the next message, or None if nothing is pending"""
+        return self._queue[0][0] if self._queue else None
+
+    def has_pending(self) -> bool:
+        return bool(self._queue)
+
+    def clear(self):
+        self._queue = []
+
+    def drain(self, deliver, wait=time.sleep):
+        """
+        Deliver every pending message at its due time (blocking; for the CLI,
+        whose loop has nothing else to do meanwhile).
+        """
+        while self._queue:
+            delay = self.next_due() - time.time()
+            if delay > 0:
+                wait(delay)
+            for message in self.pop_due():
+                deliver(message)
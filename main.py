@@ -1,14 +1,13 @@
 """
 CLI Main Interface - Dr. Anne Rosental and Hiro Lin Only
 Complete main.py implementation
+The coach engine, prompts and scenario database are imported when first needed,
+so the menu appears without loading them
 """
 
 import os
-from Anne_Rosental import AnneRosental
-from Hiro_Lin import HiroLin
-from Anne_Rosental_prompt import ANNE_SYSTEM_PROMPT
-from Hiro_Lin_prompt import HIRO_SYSTEM_PROMPT
-from conversation_database import CONVERSATION_STARTERS, SCENARIO_RESPONSES
+from session_store import create_session_store
+from delivery_scheduler import DeliveryScheduler
 
 # ===== COACH INFORMATION =====
 COACH_INFO = {
@@ -33,13 +32,41 @@ COACH_INFO = {
 }
 
 # ===== COACH INITIALIZATION =====
+def create_coach_instance(coach_key, session_store=None, session_id=None):
+    """Build one coach, importing its class, prompt and the scenario content on first use"""
+    from content_store import get_content_store
+    if coach_key == 'anne':
+        from Anne_Rosental import AnneRosental as coach_class
+    else:
+        from Hiro_Lin import HiroLin as coach_class
+    return coach_class(coach_class.persona.system_prompt, get_content_store(), session_store=session_store,
+                       session_id=f"{session_id}-{coach_key}" if session_id else None)
+
+
+class CoachRegistry(dict):
+    """Coach instances by key; each coach is created the first time it is selected"""
+
+    def __init__(self, session_store=None, session_id=None):
+        super().__init__()
+        self.session_store = session_store
+        self.session_id = session_id
+
+    def __missing__(self, coach_key):
+        if coach_key not in COACH_INFO:
+            raise KeyError(coach_key)
+        coach = self[coach_key] = create_coach_instance(coach_key, self.session_store, self.session_id)
+        return coach
+
+
 def initialize_coaches():
-    """Initialize all coach instances"""
-    coaches = {
-        'anne': AnneRosental(ANNE_SYSTEM_PROMPT, SCENARIO_RESPONSES),
-        'hiro': HiroLin(HIRO_SYSTEM_PROMPT, SCENARIO_RESPONSES)
-    }
-    return coaches
+    """
+    Initialize the coach registry (coaches are built on first selection).
+    With SESSION_DB_PATH set, conversations are persisted and the CLI resumes
+    the previous session (SESSION_ID, default 'cli') on restart.
+    """
+    session_store = create_session_store()
+    session_id = os.getenv("SESSION_ID", "cli") if session_store else None
+    return CoachRegistry(session_store, session_id)
 
 # ===== DISPLAY FUNCTIONS =====
 def clear_screen():
@@ -95,7 +122,8 @@ def display_coach_details():
 
 def display_conversation_starters(coach_key):
     """Display conversation starters for selected coach"""
-    starters = CONVERSATION_STARTERS.get(coach_key, {})
+    from content_store import get_content_store
+    starters = get_content_store().conversation_starters.get(coach_key, {})
     coach_name = COACH_INFO[coach_key]['name']
     
     clear_screen()
@@ -125,7 +153,8 @@ def display_conversation_starters(coach_key):
 
 def display_scenario_responses(coach_key):
     """Display scenario responses for selected coach"""
-    scenarios = SCENARIO_RESPONSES.get(coach_key, {})
+    from content_store import get_content_store
+    scenarios = get_content_store().scenarios_for(coach_key)
     coach_name = COACH_INFO[coach_key]['name']
     
     clear_screen()
@@ -202,6 +231,7 @@ def display_chat_header(coach_key):
 def start_chat_session(coach_key, coach_instance):
     """Start chat session with selected coach"""
     coach_name = COACH_INFO[coach_key]['name']
+    scheduled_messages = DeliveryScheduler()
     display_chat_header(coach_key)
     print(f"{coach_name}: Hello! I'm here to support you. What's on your mind today?\n")
 
@@ -263,17 +293,26 @@ def start_chat_session(coach_key, coach_instance):
 
         # Get coach response
         try:
-            response = coach_instance.get_response(user_input)
+            response = coach_instance.stream_response(user_input)
 
             # Handle safety protocol for red zone - return dict for backend to handle
             if isinstance(response, dict) and response.get("type") == "red":
-                # Return the structured response for backend to handle timing and termination
                 print(f"\n{coach_name}: {response['initial']}\n")
-                # Backend will handle: 5-second delay, care_message, stop_message, and termination
+                # Care message and stop message follow 5 and 10 seconds later
+                scheduled_messages.schedule_red_zone(response)
+                scheduled_messages.drain(lambda msg: print(f"{coach_name}: {msg.content}\n"))
+                continue
+
+            # Amber zone (warning) or database response
+            if isinstance(response, str):
+                print(f"\n{coach_name}: {response}\n")
                 continue
 
-            # Amber zone (warning) or normal
-            print(f"\n{coach_name}: {response}\n")
+            # Creative response - print deltas as they arrive
+            print(f"\n{coach_name}: ", end="", flush=True)
+            for delta in response:
+                print(delta, end="", flush=True)
+            print("\n")
         except Exception as e:
             print(f"\n\u274c Error: {str(e)}\n")
 
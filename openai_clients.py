@@ -0,0 +1,114 @@
+"""
+OpenAI Clients - Process-wide client registry shared by every coach instance
+One sync client per process, created on the first LLM call; async clients are pooled
+per event loop. Coaches never own a client, so creating one opens no connections.
+The openai SDK (and httpx) are imported on the first client request, not at import time
+"""
+
+import os
+import threading
+import time
+import weakref
+
+# ===== CONNECTION POOL SETTINGS =====
+MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20"))
+KEEPALIVE_EXPIRY = 30.0
+PRECONNECT_TIMEOUT = 5.0
+
+# An httpx connection pool belongs to the event loop that opened it
+_async_clients = weakref.WeakKeyDictionary()
+
+# The sync client is rebuilt after a fork: pooled sockets must not be shared across processes
+_sync_client = None
+_sync_http_client = None
+_sync_client_pid = None
+_sync_client_lock = threading.Lock()
+_last_preconnect = 0.0
+
+
+def _pool_limits():
+    """Connection pool limits shared by every client in this process"""
+    import httpx
+
+    return httpx.Limits(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=KEEPALIVE_EXPIRY
+    )
+
+
+def get_sync_client():
+    """
+    Return the process-wide OpenAI client, creating it on first use.
+    Thread-safe; every coach in the process shares its keep-alive pool.
+    """
+    global _sync_client, _sync_http_client, _sync_client_pid
+    client = _sync_client
+    if client is not None and _sync_client_pid == os.getpid():
+        return client
+    with _sync_client_lock:
+        if _sync_client is None or _sync_client_pid != os.getpid():
+            from openai import DefaultHttpxClient, OpenAI
+
+            _sync_http_client = DefaultHttpxClient(limits=_pool_limits())
+            _sync_client = OpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                max_retries=0,  # retried by resilience.py
+                http_client=_sync_http_client
+            )
+            _sync_client_pid = os.getpid()
+        return _sync_client
+
+
+def _open_connection():
+    import httpx
+    import openai
+
+    try:
+        client = get_sync_client()
+    except openai.OpenAIError:
+        return  # not configured (e.g. no API key): the turn itself reports it via the fallback reply
+    try:
+        # Any answer (even 404) leaves a TLS connection in the keep-alive pool
+        _sync_http_client.head(str(client.base_url), timeout=PRECONNECT_TIMEOUT)
+    except (httpx.HTTPError, OSError):
+        pass
+
+
+def preconnect():
+    """
+    Open a pooled connection to the API in the background, so the next
+    completion skips DNS, TCP and TLS setup. No-op while a preconnect from
+    the last keep-alive period may still be open, or without an API key.
+    """
+    global _last_preconnect
+    if not os.getenv("OPENAI_API_KEY"):
+        return
+    now = time.monotonic()
+    with _sync_client_lock:
+        if _last_preconnect and now - _last_preconnect < KEEPALIVE_EXPIRY / 2:
+            return
+        _last_preconnect = now
+    threading.Thread(target=_open_connection, name="openai-preconnect", daemon=True).start()
+
+
+def get_async_client():
+    """
+    Return the process-wide AsyncOpenAI client for the running event loop,
+    creating it on first use. Must be called from inside a coroutine.
+    """
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+        client = AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            max_retries=0,  # retried by resilience.py
+            http_client=DefaultAsyncHttpxClient(limits=_pool_limits())
+        )
+        _async_clients[loop] = client
+    return client
@@ -0,0 +1,67 @@
+"""
+Prompt Layout - Cache-friendly request building and prompt cache accounting
+Keeps the static system prompt as a byte-stable prefix so provider prefix caching can hit
+"""
+
+import hashlib
+import threading
+
+
+def prompt_fingerprint(prompt: str) -> str:
+    """Short, stable version id for a system prompt (changes whenever a byte changes)"""
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+
+
+def build_chat_messages(static_prompt: str, dynamic_messages: list, history: list) -> list:
+    """
+    Assemble a chat completion payload in cache-friendly order:
+      1. the static system prompt, exactly as configured (never formatted per turn)
+      2. dynamic per-session context (session memory, user details, ...)
+      3. conversation history, oldest first
+    Anything that changes between turns must go in 2 or 3 so the prefix stays identical.
+    """
+    messages = [{"role": "system", "content": static_prompt}]
+    messages.extend(dynamic_messages)
+    messages.extend(history)
+    return messages
+
+
+class PromptCacheStats:
+    """Running totals of prompt tokens vs. provider-cached prompt tokens"""
+
+    def __init__(self):
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.last_cached_tokens = 0
+        self._lock = threading.Lock()
+
+    def record(self, usage):
+        """Record `usage` from a completion response (ignored if missing)"""
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = (getattr(details, "cached_tokens", None) or 0) if details else 0
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += usage.prompt_tokens or 0
+            self.cached_tokens += cached
+            self.last_cached_tokens = cached
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of prompt tokens served from the provider cache"""
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_tokens": self.cached_tokens,
+            "last_cached_tokens": self.last_cached_tokens,
+            "hit_rate": round(self.hit_rate, 4)
+        }
+
+
+# Totals across every coach instance in this process
+PROCESS_PROMPT_CACHE_STATS = PromptCacheStats()
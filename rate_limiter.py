@@ -0,0 +1,250 @@
+"""
+Rate Limiter - Process-wide admission control for OpenAI requests
+Token buckets for requests/minute and tokens/minute, a bounded wait queue,
+and round-robin admission across sessions so one busy session cannot starve the others
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+from context_window import estimate_tokens, MESSAGE_OVERHEAD
+from turn_metrics import TURN_METRICS
+
+# ===== DEFAULTS (0 = no limit) =====
+RPM_LIMIT = int(os.getenv("OPENAI_RPM_LIMIT", "0"))
+TPM_LIMIT = int(os.getenv("OPENAI_TPM_LIMIT", "0"))
+MAX_WAIT = float(os.getenv("OPENAI_RATE_MAX_WAIT", "10"))
+
+# Bucket capacity in seconds of the per-minute rate (how big a burst may be)
+BURST_SECONDS = 10.0
+
+# Async waiters re-check at least this often
+ASYNC_POLL_INTERVAL = 0.05
+
+
+class RateLimitTimeout(Exception):
+    """The request could not be admitted within the maximum wait"""
+
+
+def estimate_request_tokens(messages: list, max_tokens: int, count_tokens=estimate_tokens) -> int:
+    """Up-front TPM estimate: prompt tokens plus the completion allowance (as the provider counts it)"""
+    return sum(count_tokens(m["content"]) + MESSAGE_OVERHEAD for m in messages) + (max_tokens or 0)
+
+
+class TokenBucket:
+    """Refills continuously at `per_minute`/60 units per second up to `capacity`; may go negative"""
+
+    def __init__(self, per_minute: float, burst_seconds: float = BURST_SECONDS):
+        self.rate = per_minute / 60.0
+        self.capacity = max(per_minute * burst_seconds / 60.0, 1.0)
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` is available (requests larger than the bucket need a full bucket)"""
+        self._refill(now)
+        needed = min(amount, self.capacity) - self.level
+        return max(needed / self.rate, 0.0)
+
+    def take(self, amount: float):
+        self.level -= amount
+
+    def give(self, amount: float):
+        self.level = min(self.capacity, self.level + amount)
+
+
+class Reservation:
+    """Tokens admitted for one request; settle with reconcile(usage) or release() on failure"""
+    __slots__ = ('limiter', 'tokens', 'settled')
+
+    def __init__(self, limiter, tokens: int):
+        self.limiter = limiter
+        self.tokens = tokens
+        self.settled = False
+
+    def reconcile(self, usage):
+        """Replace the estimate with the actual total_tokens from response.usage"""
+        if self.settled or usage is None or self.limiter is None:
+            return
+        self.settled = True
+        self.limiter._adjust_tokens(self.tokens - (usage.total_tokens or 0))
+
+    def release(self):
+        """The request failed before using tokens: give the estimate back"""
+        if self.settled or self.limiter is None:
+            return
+        self.settled = True
+        self.limiter._adjust_tokens(self.tokens)
+
+
+class RateLimiter:
+    """
+    Admission control in front of every chat.completions.create call.
+
+    Each request first takes one unit from the RPM bucket and its estimated
+    tokens from the TPM bucket. Waiting requests queue per session key; when
+    capacity frees up, sessions are served round-robin (one request each per
+    round), so a session with many queued requests does not delay others more
+    than one request's worth. Requests waiting longer than max_wait raise
+    RateLimitTimeout. With both limits at 0 the limiter admits immediately.
+    """
+
+    def __init__(self, rpm: int = RPM_LIMIT, tpm: int = TPM_LIMIT, max_wait: float = MAX_WAIT,
+                 burst_seconds: float = BURST_SECONDS):
+        self.max_wait = max_wait
+        self.requests = TokenBucket(rpm, burst_seconds) if rpm else None
+        self.tokens = TokenBucket(tpm, burst_seconds) if tpm else None
+        self.counters = {"admitted": 0, "queued": 0, "timed_out": 0}
+        self.wait_seconds = 0.0
+        self._queues = OrderedDict()  # session key -> deque of waiting tickets, in round-robin order
+        self._cond = threading.Condition()
+
+    @property
+    def enabled(self) -> bool:
+        return self.requests is not None or self.tokens is not None
+
+    # ===== ADMISSION =====
+    def _wait_time(self, tokens: int, now: float) -> float:
+        wait = 0.0
+        if self.requests is not None:
+            wait = self.requests.wait_time(1, now)
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.wait_time(tokens, now))
+        return wait
+
+    def _enqueue(self, key: str):
+        ticket = object()
+        self._queues.setdefault(key, deque()).append(ticket)
+        return ticket
+
+    def _dequeue(self, key: str, ticket, served: bool):
+        queue = self._queues[key]
+        queue.remove(ticket)
+        if not queue:
+            del self._queues[key]
+        elif served:
+            self._queues.move_to_end(key)  # back of the round
+        self._cond.notify_all()
+
+    def _try_admit(self, key: str, ticket, tokens: int, now: float) -> float:
+        """Admit `ticket` if it is next in line and capacity allows; returns 0.0 or the time to wait"""
+        head_key = next(iter(self._queues))
+        if head_key != key or self._queues[key][0] is not ticket:
+            return -1.0  # not our turn: wait for a notify
+        wait = self._wait_time(tokens, now)
+        if wait > 0:
+            return wait
+        if self.requests is not None:
+            self.requests.take(1)
+        if self.tokens is not None:
+            self.tokens.take(tokens)
+        self._dequeue(key, ticket, served=True)
+        self.counters["admitted"] += 1
+        return 0.0
+
+    def _abandon(self, key: str, ticket):
+        """Drop a waiter that stopped waiting (cancelled, interrupted) so it cannot block the queue"""
+        if ticket in self._queues.get(key, ()):
+            self._dequeue(key, ticket, served=False)
+
+    def _timed_out(self, key: str, ticket, waited: float):
+        self._dequeue(key, ticket, served=False)
+        self.counters["timed_out"] += 1
+        raise RateLimitTimeout(f"OpenAI request not admitted within {waited:.1f}s")
+
+    def acquire(self, key: str, tokens: int, max_wait: float = None) -> Reservation:
+        """Block until the request may be sent; returns its Reservation"""
+        if not self.enabled:
+            return Reservation(None, tokens)
+        started = time.monotonic()
+        deadline = started + (self.max_wait if max_wait is None else max_wait)
+        with self._cond:
+            ticket = self._enqueue(key)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = self._try_admit(key, ticket, tokens, now)
+                    if wait == 0.0:
+                        self._book_wait(now - started)
+                        return Reservation(self, tokens)
+                    if now >= deadline:
+                        self._timed_out(key, ticket, now - started)
+                    self._cond.wait(min(deadline - now, wait) if wait > 0 else deadline - now)
+            except BaseException:
+                self._abandon(key, ticket)
+                raise
+
+    async def acquire_async(self, key: str, tokens: int, max_wait: float = None) -> Reservation:
+        """acquire() for coroutines: same queue, but waits with asyncio.sleep"""
+        import asyncio  # already loaded: we are running in its event loop
+
+        if not self.enabled:
+            return Reservation(None, tokens)
+        started = time.monotonic()
+        deadline = started + (self.max_wait if max_wait is None else max_wait)
+        with self._cond:
+            ticket = self._enqueue(key)
+        try:
+            while True:
+                with self._cond:
+                    now = time.monotonic()
+                    wait = self._try_admit(key, ticket, tokens, now)
+                    if wait == 0.0:
+                        self._book_wait(now - started)
+                        return Reservation(self, tokens)
+                    if now >= deadline:
+                        self._timed_out(key, ticket, now - started)
+                await asyncio.sleep(min(deadline - now, wait if wait > 0 else ASYNC_POLL_INTERVAL,
+                                        ASYNC_POLL_INTERVAL))
+        except BaseException:
+            # A cancelled waiter left at the head of the queue would block every session
+            with self._cond:
+                self._abandon(key, ticket)
+            raise
+
+    def _book_wait(self, waited: float):
+        if waited > 0.001:
+            self.counters["queued"] += 1
+            self.wait_seconds += waited
+
+    def _adjust_tokens(self, refund: float):
+        """Return (positive) or charge (negative) tokens after the fact"""
+        if self.tokens is None:
+            return
+        with self._cond:
+            if refund >= 0:
+                self.tokens.give(refund)
+            else:
+                self.tokens.take(-refund)
+            self._cond.notify_all()
+
+    # ===== METRICS =====
+    def stats(self) -> dict:
+        with self._cond:
+            return {**self.counters, "wait_seconds": round(self.wait_seconds, 3),
+                    "waiting": sum(len(q) for q in self._queues.values())}
+
+    def prometheus_text(self) -> str:
+        stats = self.stats()
+        lines = ["# HELP openai_admission_total OpenAI requests by admission outcome.",
+                 "# TYPE openai_admission_total counter"]
+        lines += [f'openai_admission_total{{outcome="{name}"}} {stats[name]}' for name in self.counters]
+        lines += ["# HELP openai_admission_wait_seconds_total Time requests spent queued for capacity.",
+                  "# TYPE openai_admission_wait_seconds_total counter",
+                  f"openai_admission_wait_seconds_total {stats['wait_seconds']}",
+                  "# HELP openai_admission_waiting Requests currently waiting for capacity.",
+                  "# TYPE openai_admission_waiting gauge",
+                  f"openai_admission_waiting {stats['waiting']}"]
+        return "\n".join(lines) + "\n"
+
+
+# One limiter per process: the RPM/TPM limits belong to the organization, not the session
+OPENAI_RATE_LIMITER = RateLimiter()
+if OPENAI_RATE_LIMITER.enabled:
+    TURN_METRICS.add_collector(OPENAI_RATE_LIMITER.prometheus_text)
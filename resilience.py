@@ -0,0 +1,280 @@
+"""
+Resilience - Deadline, retry and circuit breaker around OpenAI chat completion calls
+Retries 429/5xx/connection errors with jittered exponential backoff inside a total time budget;
+a process-wide circuit breaker fails fast while the upstream is degraded
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+
+from turn_metrics import TURN_METRICS
+
+# ===== DEFAULTS (overridable through the environment) =====
+CALL_TIMEOUT = float(os.getenv("OPENAI_CALL_TIMEOUT", "15"))  # per attempt, seconds
+RETRY_BUDGET = float(os.getenv("OPENAI_RETRY_BUDGET", "25"))  # all attempts + backoff, seconds
+MAX_ATTEMPTS = int(os.getenv("OPENAI_MAX_ATTEMPTS", "3"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+BREAKER_STATES = (CLOSED, OPEN, HALF_OPEN)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the upstream while the circuit breaker is open"""
+
+
+class DeadlineExceeded(Exception):
+    """Raised when the retry budget ran out before any attempt was made"""
+
+
+def _openai_errors():
+    """
+    The openai module if it is loaded. It is imported with the first client
+    (openai_clients.py), so an error raised before that cannot be an SDK error.
+    """
+    return sys.modules.get("openai")
+
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limits, server errors, timeouts and connection failures are worth another try"""
+    openai = _openai_errors()
+    if openai is None:
+        return False
+    if isinstance(error, openai.APIConnectionError):  # includes APITimeoutError
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def _retry_after(error: Exception):
+    """Seconds from a Retry-After header, if the error carries one"""
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class RetryPolicy:
+    """
+    Attempts per call, backoff shape and time limits.
+    Backoff is "full jitter": uniform(0, min(max_delay, base_delay * 2**retry)).
+    """
+
+    def __init__(self, max_attempts: int = MAX_ATTEMPTS, base_delay: float = 0.25, max_delay: float = 4.0,
+                 call_timeout: float = CALL_TIMEOUT, total_budget: float = RETRY_BUDGET):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.call_timeout = call_timeout
+        self.total_budget = total_budget
+
+    def backoff(self, retry: int, error: Exception = None) -> float:
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** retry)))
+        retry_after = _retry_after(error) if error is not None else None
+        return max(delay, retry_after) if retry_after is not None else delay
+
+
+class CircuitBreaker:
+    """
+    Closed -> open when at least `min_calls` of the last `window` upstream calls
+    ran and the failure rate reached `failure_rate`. Open rejects calls for
+    `open_seconds`, then half-open lets `half_open_calls` probes through: a
+    successful probe closes the breaker, a failed one opens it again.
+    """
+
+    def __init__(self, failure_rate: float = 0.5, window: int = 20, min_calls: int = 10,
+                 open_seconds: float = 30.0, half_open_calls: int = 1):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.state = CLOSED
+        self.transitions = {state: 0 for state in BREAKER_STATES}  # times each state was entered
+        self._outcomes = deque(maxlen=window)  # True = failure
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    def _enter(self, state: str):
+        self.state = state
+        self.transitions[state] += 1
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        elif state == HALF_OPEN:
+            self._probes = 0
+        else:
+            self._outcomes.clear()
+
+    def allow(self) -> bool:
+        """True if a call may go upstream now"""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                self._enter(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self._probes >= self.half_open_calls:
+                    return False
+                self._probes += 1
+                return True
+            return self.state == CLOSED
+
+    def record_success(self):
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._enter(CLOSED)
+            else:
+                self._outcomes.append(False)
+
+    def record_neutral(self):
+        """The call ended without telling anything about the upstream: free its probe slot"""
+        with self._lock:
+            if self.state == HALF_OPEN and self._probes:
+                self._probes -= 1
+
+    def record_failure(self):
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._enter(OPEN)
+                return
+            self._outcomes.append(True)
+            if (self.state == CLOSED and len(self._outcomes) >= self.min_calls
+                    and sum(self._outcomes) / len(self._outcomes) >= self.failure_rate):
+                self._enter(OPEN)
+
+
+class ResilientCaller:
+    """
+    Runs `create(**params)` under a RetryPolicy and a CircuitBreaker.
+
+    Every attempt gets timeout=min(call_timeout, remaining budget). Retryable
+    errors back off and try again while attempts and budget remain; other
+    errors propagate at once and do not count against the breaker. Once a
+    call has used up its attempts or budget, it counts as one failure for the
+    breaker. Raises CircuitOpenError without calling upstream while the
+    breaker is open, and DeadlineExceeded if the budget left no time for an
+    attempt. A stream (stream=True) counts as a success once it is opened;
+    call stream_failed() if reading it breaks afterwards.
+    """
+
+    def __init__(self, policy: RetryPolicy = None, breaker: CircuitBreaker = None):
+        self.policy = policy or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.counters = {"calls": 0, "attempts": 0, "successes": 0, "failures": 0,
+                         "retries": 0, "timeouts": 0, "rejected": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _attempts(self):
+        """Yield (attempt number, per-attempt timeout) while attempts and budget remain"""
+        self._count("calls")
+        if not self.breaker.allow():
+            self._count("rejected")
+            raise CircuitOpenError("OpenAI circuit breaker is open")
+        deadline = time.monotonic() + self.policy.total_budget
+        for attempt in range(self.policy.max_attempts):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            self._count("attempts")
+            yield attempt, min(self.policy.call_timeout, remaining), deadline
+
+    def _failed(self, error: Exception, attempt: int, deadline: float):
+        """Book a failed attempt; returns the backoff before the next one, or None to give up"""
+        openai = _openai_errors()
+        if not is_retryable(error):
+            if openai is not None and isinstance(error, openai.APIStatusError):
+                # The upstream answered (e.g. 400): not a sign of degradation
+                self.breaker.record_success()
+            else:
+                # Never reached the upstream (e.g. rate_limiter.RateLimitTimeout)
+                self.breaker.record_neutral()
+            raise error
+        if isinstance(error, openai.APITimeoutError):
+            self._count("timeouts")
+        delay = self.policy.backoff(attempt, error)
+        if attempt + 1 >= self.policy.max_attempts or time.monotonic() + delay >= deadline:
+            self._count("failures")
+            self.breaker.record_failure()
+            return None
+        self._count("retries")
+        return delay
+
+    def _succeeded(self, result):
+        self._count("successes")
+        self.breaker.record_success()
+        return result
+
+    def _gave_up(self, error: Exception) -> Exception:
+        """The exception a call raises once no attempt is left"""
+        if error is not None:
+            return error
+        self.breaker.record_neutral()
+        return DeadlineExceeded(f"OpenAI retry budget of {self.policy.total_budget}s ran out before an attempt")
+
+    def stream_failed(self, error: Exception):
+        """A stream opened through call() broke while it was read: count it against the breaker"""
+        self._count("failures")
+        self.breaker.record_failure()
+
+    def call(self, create, **params):
+        error = None
+        for attempt, timeout, deadline in self._attempts():
+            try:
+                return self._succeeded(create(timeout=timeout, **params))
+            except Exception as e:
+                error = e
+                delay = self._failed(e, attempt, deadline)
+                if delay is None:
+                    break
+                time.sleep(delay)
+        raise self._gave_up(error)
+
+    async def call_async(self, create, **params):
+        import asyncio  # already loaded: we are running in its event loop
+
+        error = None
+        for attempt, timeout, deadline in self._attempts():
+            try:
+                return self._succeeded(await create(timeout=timeout, **params))
+            except Exception as e:
+                error = e
+                delay = self._failed(e, attempt, deadline)
+                if delay is None:
+                    break
+                await asyncio.sleep(delay)
+        raise self._gave_up(error)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"state": self.breaker.state, "transitions": dict(self.breaker.transitions), **self.counters}
+
+    def prometheus_text(self) -> str:
+        """Counters and breaker state in the Prometheus text exposition format"""
+        stats = self.stats()
+        lines = ["# HELP openai_calls_total OpenAI call outcomes through the resilience layer.",
+                 "# TYPE openai_calls_total counter"]
+        lines += [f'openai_calls_total{{outcome="{name}"}} {stats[name]}' for name in self.counters]
+        lines += ["# HELP openai_circuit_state 1 for the current circuit breaker state.",
+                  "# TYPE openai_circuit_state gauge"]
+        lines += [f'openai_circuit_state{{state="{state}"}} {int(stats["state"] == state)}'
+                  for state in BREAKER_STATES]
+        lines += ["# HELP openai_circuit_transitions_total Times the circuit breaker entered each state.",
+                  "# TYPE openai_circuit_transitions_total counter"]
+        lines += [f'openai_circuit_transitions_total{{state="{state}"}} {count}'
+                  for state, count in stats["transitions"].items()]
+        return "\n".join(lines) + "\n"
+
+
+# One breaker per process: every coach talks to the same upstream
+OPENAI_RESILIENCE = ResilientCaller()
+TURN_METRICS.add_collector(OPENAI_RESILIENCE.prometheus_text)
@@ -0,0 +1,129 @@
+"""
+Response Cache - Opt-in cache for context-free creative responses
+In-memory and SQLite backends with LRU + TTL eviction and hit/miss counters
+"""
+
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL_SECONDS = 24 * 3600
+
+
+def normalize_message(message: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation"""
+    return re.sub(r"\s+", " ", message.lower()).strip().rstrip(".!?… ")
+
+
+def response_cache_key(coach: str, message: str, prompt_version: str) -> str:
+    """Cache key: coach + system prompt version + normalized message"""
+    return f"{coach}|{prompt_version}|{normalize_message(message)}"
+
+
+class ResponseCache:
+    """Shared hit/miss accounting; backends implement _get and _set"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        """Return the cached response or None, counting the hit or miss"""
+        with self._lock:
+            value = self._get(key, time.time())
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._set(key, value, time.time())
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": round(self.hit_rate, 4),
+                "entries": len(self)}
+
+
+class MemoryResponseCache(ResponseCache):
+    """Per-process LRU cache with TTL"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        super().__init__(max_entries, ttl_seconds)
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _get(self, key: str, now: float):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if now - entry[0] > self.ttl_seconds:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def _set(self, key: str, value: str, now: float):
+        self._entries[key] = (now, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class SqliteResponseCache(ResponseCache):
+    """On-disk cache shared by every process pointing at the same file"""
+
+    def __init__(self, path: str, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        super().__init__(max_entries, ttl_seconds)
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL, used_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS response_cache_used ON response_cache (used_at)")
+
+    def __len__(self):
+        with self._lock:  # the connection is shared across threads
+            return self._conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+
+    def _get(self, key: str, now: float):
+        row = self._conn.execute(
+            "SELECT value, stored_at FROM response_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if now - row[1] > self.ttl_seconds:
+            self._conn.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+            return None
+        self._conn.execute("UPDATE response_cache SET used_at = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def _set(self, key: str, value: str, now: float):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO response_cache (key, value, stored_at, used_at) VALUES (?, ?, ?, ?)",
+            (key, value, now, now))
+        # Drop expired rows, then least recently used rows beyond the size limit
+        self._conn.execute("DELETE FROM response_cache WHERE stored_at < ?", (now - self.ttl_seconds,))
+        self._conn.execute(
+            "DELETE FROM response_cache WHERE key IN ("
+            "SELECT key FROM response_cache ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,))
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,381 @@
+"""
+Safety Audit Log - Structured red/amber events written off the request path
+Coaches enqueue events; a background thread writes them in batches to one or more sinks
+(rotating JSONL files, SQLite, or the `logging` module) and flushes everything at shutdown
+"""
+
+import atexit
+import hashlib
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, one writing process per JSONL path
+    fcntl = None
+
+# fsync policies: after every written batch, or leave it to the OS
+FSYNC_BATCH = "batch"
+FSYNC_NEVER = "never"
+
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_FLUSH_INTERVAL = 0.5
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+
+
+def message_hash(message: str) -> str:
+    """SHA-256 of the user message: lets auditors match events without storing the text"""
+    return hashlib.sha256(message.encode("utf-8")).hexdigest()
+
+
+class SafetyEvent:
+    """One red or amber detection"""
+    __slots__ = ('timestamp', 'session_id', 'coach', 'zone', 'matched_phrase', 'message_hash')
+
+    def __init__(self, session_id: str, coach: str, zone: str, matched_phrase: str,
+                 message_hash: str, timestamp: float = None):
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.session_id = session_id
+        self.coach = coach
+        self.zone = zone
+        self.matched_phrase = matched_phrase
+        self.message_hash = message_hash
+
+    def as_dict(self) -> dict:
+        return {
+            "timestamp": datetime.fromtimestamp(self.timestamp, timezone.utc).isoformat(),
+            "session_id": self.session_id,
+            "coach": self.coach,
+            "zone": self.zone,
+            "matched_phrase": self.matched_phrase,
+            "message_hash": self.message_hash
+        }
+
+    def __repr__(self):
+        return f"SafetyEvent({self.zone!r}, {self.coach!r}, {self.session_id!r}, {self.matched_phrase!r})"
+
+
+# ===== SINKS =====
+class JsonlAuditSink:
+    """
+    Appends one JSON object per event; rotates to path.1 ... path.<backup_count>
+    once the file exceeds max_bytes (like logging.handlers.RotatingFileHandler).
+
+    Several processes may share one path (coach_server and replay workers):
+    each batch is written under an exclusive lock on path.lock, the size is
+    taken from the file itself rather than this process's handle, and a
+    process whose file was rotated by another reopens the path first. Without
+    fcntl (Windows) only one process may write a given path.
+    """
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES,
+                 backup_count: int = DEFAULT_BACKUP_COUNT, fsync: str = FSYNC_BATCH):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.fsync = fsync
+        self._lock_file = open(f"{path}.lock", "a") if fcntl is not None else None
+        self._file = open(path, "a", encoding="utf-8")
+
+    @contextmanager
+    def _locked(self):
+        if self._lock_file is None:
+            yield
+            return
+        fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _reopen_if_rotated(self):
+        """Another process moved the file away: append to the current one at path"""
+        try:
+            current = os.stat(self.path)
+        except FileNotFoundError:
+            current = None
+        if current is None or current.st_ino != os.fstat(self._file.fileno()).st_ino:
+            self._file.close()
+            self._file = open(self.path, "a", encoding="utf-8")
+
+    def write_batch(self, events: list):
+        with self._locked():
+            self._reopen_if_rotated()
+            self._file.write("".join(json.dumps(event.as_dict()) + "\n" for event in events))
+            self._file.flush()
+            if self.fsync == FSYNC_BATCH:
+                os.fsync(self._file.fileno())
+            if self.max_bytes and os.fstat(self._file.fileno()).st_size >= self.max_bytes:
+                self._rotate()
+
+    def _rotate(self):
+        self._file.close()
+        for i in range(self.backup_count - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        if self.backup_count:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def close(self):
+        self._file.close()
+        if self._lock_file is not None:
+            self._lock_file.close()
+
+
+class SqliteAuditSink:
+    """Inserts each batch in one transaction; fsync=batch maps to synchronous=FULL"""
+
+    def __init__(self, path: str, fsync: str = FSYNC_BATCH):
+        self.path = path
+        self.fsync = fsync
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA synchronous={'FULL' if fsync == FSYNC_BATCH else 'NORMAL'}")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS safety_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp REAL NOT NULL,
+                session_id TEXT,
+                coach TEXT NOT NULL,
+                zone TEXT NOT NULL,
+                matched_phrase TEXT,
+                message_hash TEXT NOT NULL
+            )
+        """)
+
+    def write_batch(self, events: list):
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.executemany(
+                "INSERT INTO safety_events (timestamp, session_id, coach, zone, matched_phrase, message_hash) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(e.timestamp, e.session_id, e.coach, e.zone, e.matched_phrase, e.message_hash) for e in events])
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def close(self):
+        self._conn.close()
+
+
+class LoggingAuditSink:
+    """Emits events through the `logging` module (default sink: console visibility, no files)"""
+
+    def __init__(self, logger_name: str = "coach.safety"):
+        self.logger = logging.getLogger(logger_name)
+
+    def write_batch(self, events: list):
+        for event in events:
+            level = logging.CRITICAL if event.zone == "red" else logging.WARNING
+            self.logger.log(level, "[SAFETY %s] %s", event.zone.upper(), json.dumps(event.as_dict()))
+
+    def close(self):
+        pass
+
+
+# ===== BACKGROUND WRITER =====
+MAX_RETRY_BACKOFF = 30.0
+CLOSE_TIMEOUT = 10.0  # seconds close() waits for the writer; sinks retry every flush_interval meanwhile
+
+
+class _SinkState:
+    """Events one sink has not accepted yet, and when to try it again after a failure"""
+    __slots__ = ('sink', 'pending', 'accepted', 'failures', 'retry_at')
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.pending = []
+        self.accepted = 0  # events this sink has written
+        self.failures = 0
+        self.retry_at = 0.0
+
+
+class SafetyAuditLog:
+    """
+    Non-blocking front end for the sinks.
+
+    record() only enqueues; a daemon thread drains the queue in batches of up
+    to batch_size events (or whatever arrived within flush_interval seconds)
+    and hands each batch to every sink. Every sink has its own backlog: a sink
+    error is logged and only that sink retries its unwritten events (with
+    exponential backoff), so events are neither dropped nor written twice to
+    the sinks that succeeded. flush() blocks until everything recorded so far
+    is written to every sink; close() (also run at interpreter exit) flushes
+    and stops the writer. While closing, a failing sink retries every
+    flush_interval so it gets several tries within CLOSE_TIMEOUT; events still
+    unwritten then are counted in an error log, and the sinks are left open
+    for the writer thread.
+    """
+
+    def __init__(self, sinks: list, batch_size: int = DEFAULT_BATCH_SIZE,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        self.sinks = list(sinks)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._states = [_SinkState(sink) for sink in self.sinks]
+        self._received = 0  # events taken off the queue
+        self._markers = []  # (events received before the flush() call, its Event)
+        self._queue = queue.SimpleQueue()
+        self._closed = False
+        self._closing = False  # close() started: retry failing sinks without backing off
+        self._writer = threading.Thread(target=self._run, name="safety-audit-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    @property
+    def written(self) -> int:
+        """Events written to every sink"""
+        return min((state.accepted for state in self._states), default=self._received)
+
+    def record(self, event: SafetyEvent):
+        """Enqueue an event (never blocks on I/O)"""
+        self._queue.put(event)
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Wait until every event recorded before this call is written; False on timeout"""
+        if self._closed:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closing = True
+        self.flush(CLOSE_TIMEOUT)
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join(timeout=CLOSE_TIMEOUT)
+        if self._writer.is_alive():
+            queued = self._queue.qsize()
+            for state in self._states:
+                if state.pending or queued:
+                    logging.getLogger("coach.safety").error(
+                        "Safety audit sink %s still has %d unwritten events at close",
+                        type(state.sink).__name__, len(state.pending) + queued)
+            return  # the writer may still be inside a sink
+        for sink in self.sinks:
+            sink.close()
+
+    def _next_batch(self, wait: float) -> tuple:
+        """
+        Collect up to batch_size events, waiting at most `wait` seconds for the
+        first one (None: until one arrives); returns (events, stop)
+        """
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = max(deadline - time.monotonic(), 0) if batch else wait
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            if isinstance(item, threading.Event):
+                self._markers.append((self._received + len(batch), item))
+                break
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        stop = False
+        while True:
+            backlog = [state for state in self._states if state.pending]
+            if stop and not backlog:
+                break
+            wait = None
+            if backlog:
+                wait = max(min(state.retry_at for state in backlog) - time.monotonic(), 0)
+                if self._closing:
+                    wait = min(wait, self.flush_interval)
+            if stop:
+                time.sleep(wait)
+                batch = []
+            else:
+                batch, stop = self._next_batch(wait)
+            self._received += len(batch)
+            for state in self._states:
+                state.pending.extend(batch)
+                self._write(state)
+            self._release_markers()
+
+    def _write(self, state: _SinkState):
+        """Hand a sink its unwritten events (oldest first) unless it is backing off"""
+        if not state.pending or (time.monotonic() < state.retry_at and not self._closing):
+            return
+        while state.pending:
+            chunk = state.pending[:self.batch_size]
+            try:
+                state.sink.write_batch(chunk)
+            except Exception:
+                state.failures += 1
+                backoff = min(self.flush_interval * 2 ** (state.failures - 1), MAX_RETRY_BACKOFF)
+                if self._closing:
+                    backoff = self.flush_interval
+                state.retry_at = time.monotonic() + backoff
+                logging.getLogger("coach.safety").exception(
+                    "Safety audit sink %s failed; retrying its %d unwritten events in %.1fs",
+                    type(state.sink).__name__, len(state.pending), backoff)
+                return
+            del state.pending[:len(chunk)]
+            state.accepted += len(chunk)
+            state.failures = 0
+            state.retry_at = 0.0
+
+    def _release_markers(self):
+        written = self.written
+        waiting = []
+        for received, marker in self._markers:
+            if received <= written:
+                marker.set()
+            else:
+                waiting.append((received, marker))
+        self._markers = waiting
+
+
+def create_safety_audit_log() -> SafetyAuditLog:
+    """
+    Audit log configured by the environment:
+      SAFETY_AUDIT_JSONL  - rotating JSONL file (SAFETY_AUDIT_MAX_BYTES, SAFETY_AUDIT_BACKUPS)
+      SAFETY_AUDIT_DB     - SQLite database
+      SAFETY_AUDIT_FSYNC  - 'batch' (default) or 'never'
+    Without a file sink, events go to the `coach.safety` logger.
+    """
+    fsync = os.getenv("SAFETY_AUDIT_FSYNC", FSYNC_BATCH)
+    sinks = []
+    if os.getenv("SAFETY_AUDIT_JSONL"):
+        sinks.append(JsonlAuditSink(os.getenv("SAFETY_AUDIT_JSONL"),
+                                    max_bytes=int(os.getenv("SAFETY_AUDIT_MAX_BYTES", DEFAULT_MAX_BYTES)),
+                                    backup_count=int(os.getenv("SAFETY_AUDIT_BACKUPS", DEFAULT_BACKUP_COUNT)),
+                                    fsync=fsync))
+    if os.getenv("SAFETY_AUDIT_DB"):
+        sinks.append(SqliteAuditSink(os.getenv("SAFETY_AUDIT_DB"), fsync=fsync))
+    return SafetyAuditLog(sinks or [LoggingAuditSink()])
+
+
+# Shared by every coach instance in this process, started on the first safety event
+_audit_log = None
+_audit_log_lock = threading.Lock()
+
+
+def get_safety_audit_log() -> SafetyAuditLog:
+    """Return the process-wide audit log, creating it from the environment on first use"""
+    global _audit_log
+    with _audit_log_lock:
+        if _audit_log is None:
+            _audit_log = create_safety_audit_log()
+        return _audit_log
@@ -0,0 +1,173 @@
+"""
+Safety Engine - Shared crisis keyword scanner for all coaches
+Compiles the red/amber lexicon once at import into a single trie-shaped regex
+"""
+
+import bisect
+import re
+
+# ===== SAFETY LEXICON =====
+# Matching is case-insensitive plain substring matching (same as the original
+# per-keyword `in` checks). Add phrases for new languages to the same tuples.
+
+RED_KEYWORDS = (
+    'want to die', 'kill myself', 'end it', 'suicide',
+    'hurt myself', 'harm myself', 'plan to hurt',
+    'no reason to live', "can't go on", 'hear voices',
+    'harm someone', 'attack someone', 'planning how to kill',
+    'everyone would be better off without me', "don't want to live"
+)
+
+AMBER_KEYWORDS = (
+    'feel numb', 'tired of everything', 'wish i could disappear',
+    'nothing matters', "can't handle this", 'completely empty',
+    "can't function", "can't get out of bed", 'no point in trying'
+)
+
+# Zones in priority order - the first zone listed wins when phrases overlap
+ZONE_PRIORITY = ('red', 'amber')
+
+
+def _trie_pattern(phrases) -> str:
+    """
+    Build a regex alternation from a character trie of the phrases.
+    Shared prefixes are factored out, so the regex engine walks each
+    position at most once per character instead of once per phrase.
+    Longer phrases are preferred over their own prefixes.
+    """
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def render(node) -> str:
+        terminal = '' in node
+        branches = [re.escape(char) + render(child)
+                    for char, child in sorted(node.items()) if char != '']
+        if not branches:
+            return ''
+        if len(branches) == 1 and not terminal:
+            return branches[0]
+        body = '(?:' + '|'.join(branches) + ')'
+        return body + '?' if terminal else body
+
+    return render(trie)
+
+
+class SafetyMatch:
+    """A single lexicon hit: phrase, zone and offsets into the lowercased message"""
+    __slots__ = ('phrase', 'zone', 'start', 'end')
+
+    def __init__(self, phrase: str, zone: str, start: int, end: int):
+        self.phrase = phrase
+        self.zone = zone
+        self.start = start
+        self.end = end
+
+    def __repr__(self):
+        return f"SafetyMatch({self.phrase!r}, {self.zone!r}, {self.start}, {self.end})"
+
+
+class SafetyScan:
+    """Result of a safety scan: overall zone plus every matched phrase"""
+    __slots__ = ('zone', 'matches')
+
+    def __init__(self, zone: str, matches: list):
+        self.zone = zone
+        self.matches = matches
+
+    @property
+    def matched_phrases(self) -> list:
+        """Matched phrases in message order"""
+        return [match.phrase for match in self.matches]
+
+    def __repr__(self):
+        return f"SafetyScan({self.zone!r}, {self.matches!r})"
+
+
+class SafetyEngine:
+    """
+    Multi-pattern safety scanner.
+    All zones are compiled into one regex with a named group per zone, wrapped
+    in a lookahead so every start offset is tried in a single left-to-right pass
+    and overlapping phrases from different zones are all reported.
+    """
+
+    def __init__(self, lexicon: dict):
+        """
+        lexicon: {zone: iterable of phrases}. Zones are checked in ZONE_PRIORITY
+        order first, then in dict order for any extra zones.
+        """
+        self.zones = [z for z in ZONE_PRIORITY if z in lexicon]
+        self.zones += [z for z in lexicon if z not in self.zones]
+        self.lexicon = {z: tuple(p.lower() for p in lexicon[z]) for z in self.zones}
+
+        alternatives = [
+            f"(?P<{zone}>{_trie_pattern(self.lexicon[zone])})"
+            for zone in self.zones if self.lexicon[zone]
+        ]
+        self.pattern = re.compile('(?=' + '|'.join(alternatives) + ')') if alternatives else None
+
+    def scan(self, message: str) -> SafetyScan:
+        """
+        Scan a message once and return the zone ('red', 'amber' or 'green')
+        with every matched phrase. Offsets refer to message.lower().
+        """
+        if self.pattern is None:
+            return SafetyScan('green', [])
+
+        message_lower = message.lower()
+        matches = []
+        found_zones = set()
+        for m in self.pattern.finditer(message_lower):
+            zone = m.lastgroup
+            start, end = m.span(zone)
+            matches.append(SafetyMatch(m.group(zone), zone, start, end))
+            found_zones.add(zone)
+
+        for zone in self.zones:
+            if zone in found_zones:
+                return SafetyScan(zone, matches)
+        return SafetyScan('green', matches)
+
+    def scan_batch(self, messages: list) -> list:
+        """
+        scan() for many messages in one regex pass: the lowercased messages are
+        joined with newlines (no phrase contains one, so no match can span two
+        messages) and each hit is mapped back to its message. Returns one
+        SafetyScan per message, identical to calling scan() on each.
+        """
+        if self.pattern is None:
+            return [SafetyScan('green', []) for _ in messages]
+
+        lowered = [message.lower() for message in messages]
+        starts = []
+        offset = 0
+        for text in lowered:
+            starts.append(offset)
+            offset += len(text) + 1
+        matches = [[] for _ in messages]
+        index = 0
+        for m in self.pattern.finditer("\n".join(lowered)):
+            zone = m.lastgroup
+            start, end = m.span(zone)
+            index = bisect.bisect_right(starts, start, lo=index) - 1
+            base = starts[index]
+            matches[index].append(SafetyMatch(m.group(zone), zone, start - base, end - base))
+
+        scans = []
+        for message_matches in matches:
+            found_zones = {match.zone for match in message_matches}
+            zone = next((z for z in self.zones if z in found_zones), 'green')
+            scans.append(SafetyScan(zone, message_matches))
+        return scans
+
+    def detect(self, message: str) -> str:
+        """Return only the zone for a message"""
+        return self.scan(message).zone
+
+
+# Built once per process and shared by every coach instance
+SAFETY_ENGINE = SafetyEngine({'red': RED_KEYWORDS, 'amber': AMBER_KEYWORDS})
@@ -0,0 +1,116 @@
+"""
+Scenario Index - Shortlisted fuzzy matching over the scenario database
+Built once per scenario dict; only a shortlist of candidates gets an exact SequenceMatcher ratio
+"""
+
+from collections import Counter
+from difflib import SequenceMatcher
+
+# Same acceptance rule the coaches always used: best ratio, and at least 70%
+SCENARIO_MATCH_THRESHOLD = 0.7
+
+
+def char_ngrams(text: str, n: int = 3) -> set:
+    """Distinct character n-grams of an already-normalized string"""
+    if len(text) <= n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class ScenarioIndex:
+    """
+    Inverted character n-gram index over the "user" text of every scenario.
+
+    match() shortlists candidates by shared n-grams (rarest grams first),
+    drops candidates whose length alone rules out the threshold, and runs the
+    exact SequenceMatcher ratio only on what is left. With shortlist_size or
+    fewer scenarios every scenario is checked, so results are identical to a
+    linear scan.
+    """
+
+    def __init__(self, scenarios: dict, threshold: float = SCENARIO_MATCH_THRESHOLD,
+                 ngram: int = 3, shortlist_size: int = 32, max_df_ratio: float = 0.05):
+        self.threshold = threshold
+        self.ngram = ngram
+        self.shortlist_size = shortlist_size
+        self.keys = []
+        self.texts = []  # pre-normalized (lowercased) scenario prompts
+        self.postings = {}
+
+        for scenario_key, scenario_data in scenarios.items():
+            if "user" not in scenario_data:
+                continue
+            entry_id = len(self.keys)
+            text = scenario_data["user"].lower()
+            self.keys.append(scenario_key)
+            self.texts.append(text)
+            for gram in char_ngrams(text, ngram):
+                self.postings.setdefault(gram, []).append(entry_id)
+
+        # Grams shared by more scenarios than this carry little signal
+        self.max_df = max(shortlist_size, int(len(self.keys) * max_df_ratio))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _shortlist(self, message_lower: str, threshold: float) -> list:
+        """Candidate entry ids in database order"""
+        if len(self.keys) <= self.shortlist_size:
+            candidates = range(len(self.keys))
+        else:
+            grams = [g for g in char_ngrams(message_lower, self.ngram) if g in self.postings]
+            grams.sort(key=lambda g: len(self.postings[g]))
+            counts = Counter()
+            for i, gram in enumerate(grams):
+                posting = self.postings[gram]
+                # Always use a few of the rarest grams so common text still gets candidates
+                if i >= 8 and len(posting) > self.max_df:
+                    break
+                counts.update(posting)
+            candidates = [entry_id for entry_id, _ in counts.most_common(self.shortlist_size)]
+
+        # ratio = 2*M/(la+lb) <= 2*min(la,lb)/(la+lb), so length alone can rule a candidate out
+        t = threshold
+        la = len(message_lower)
+        low, high = la * t / (2 - t), la * (2 - t) / t
+        return sorted(c for c in candidates if low <= len(self.texts[c]) <= high)
+
+    def match(self, user_message: str, threshold: float = None) -> tuple:
+        """
+        Return (scenario_key, similarity) for the best scenario at or above the
+        threshold (default: the index threshold), or (None, 0.0).
+        Ties keep the earliest scenario, as before.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        message_lower = user_message.lower()
+        best_match = None
+        best_ratio = 0.0
+
+        for entry_id in self._shortlist(message_lower, threshold):
+            matcher = SequenceMatcher(None, message_lower, self.texts[entry_id])
+            if matcher.quick_ratio() < threshold:
+                continue
+            similarity = matcher.ratio()
+            if similarity > best_ratio and similarity >= threshold:
+                best_ratio = similarity
+                best_match = self.keys[entry_id]
+
+        return best_match, best_ratio
+
+    def find(self, user_message: str) -> str:
+        """Return only the matching scenario key (or None)"""
+        return self.match(user_message)[0]
+
+
+# One index per scenario dict, shared by every coach instance using it.
+# The dict is kept alive alongside its index so its id() cannot be reused.
+_INDEX_CACHE = {}
+
+
+def get_scenario_index(scenarios: dict) -> ScenarioIndex:
+    """Return the shared index for a scenario dict, building it on first use"""
+    cached = _INDEX_CACHE.get(id(scenarios))
+    if cached is None or cached[0] is not scenarios:
+        cached = (scenarios, ScenarioIndex(scenarios))
+        _INDEX_CACHE[id(scenarios)] = cached
+    return cached[1]
@@ -0,0 +1,168 @@
+"""
+Semantic Router - Optional paraphrase-tolerant scenario matching
+Scenario prompts are embedded offline with a hashed TF-IDF vectorizer into a NumPy matrix
+saved next to conversation_database.py; incoming messages need one matrix-vector product.
+
+Rebuild the saved index after editing scenarios:  python semantic_router.py
+"""
+
+import hashlib
+import json
+import os
+import re
+import zlib
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency - the router is simply unavailable
+    np = None
+
+DEFAULT_INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                  "conversation_database_embeddings.npz")
+
+# Cosine similarity needed to route to a scenario (fuzzy matching still runs first)
+SEMANTIC_MATCH_THRESHOLD = 0.45
+
+HASH_DIM = 4096
+
+
+def numpy_available() -> bool:
+    return np is not None
+
+
+class HashedTfidfVectorizer:
+    """
+    Word unigrams/bigrams plus character 3-5-grams, hashed (crc32) into a
+    fixed number of buckets, weighted by sublinear TF x IDF and L2-normalized.
+    Hashing keeps the vocabulary-free model tiny and stable across processes.
+    """
+
+    def __init__(self, dim: int = HASH_DIM, idf=None):
+        self.dim = dim
+        self.idf = idf if idf is not None else np.ones(dim, dtype=np.float32)
+
+    @staticmethod
+    def features(text: str) -> list:
+        words = re.findall(r"[a-z0-9']+", text.lower())
+        feats = [f"w:{w}" for w in words]
+        feats += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+        for word in words:
+            padded = f" {word} "
+            for n in (3, 4, 5):
+                feats += [f"c:{padded[i:i + n]}" for i in range(len(padded) - n + 1)]
+        return feats
+
+    def _counts(self, text: str):
+        counts = np.zeros(self.dim, dtype=np.float32)
+        for feat in self.features(text):
+            counts[zlib.crc32(feat.encode("utf-8")) % self.dim] += 1.0
+        return counts
+
+    def fit(self, texts: list):
+        """Learn smoothed IDF weights from the scenario prompts"""
+        df = np.zeros(self.dim, dtype=np.float32)
+        for text in texts:
+            df += self._counts(text) > 0
+        self.idf = (np.log((1 + len(texts)) / (1 + df)) + 1.0).astype(np.float32)
+        return self
+
+    def transform(self, texts: list):
+        rows = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            counts = self._counts(text)
+            nonzero = counts > 0
+            rows[i, nonzero] = (1.0 + np.log(counts[nonzero])) * self.idf[nonzero]
+        norms = np.linalg.norm(rows, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return rows / norms
+
+
+class SemanticRouter:
+    """Cosine-similarity lookup of a message against precomputed scenario vectors"""
+
+    def __init__(self, keys: list, matrix, vectorizer: HashedTfidfVectorizer,
+                 threshold: float = SEMANTIC_MATCH_THRESHOLD):
+        self.keys = keys
+        self.matrix = matrix
+        self.vectorizer = vectorizer
+        self.threshold = threshold
+
+    def match(self, user_message: str) -> tuple:
+        """Return (scenario_key, similarity) of the best match at/above threshold, else (None, 0.0)"""
+        if not self.keys:
+            return None, 0.0
+        scores = self.matrix @ self.vectorizer.transform([user_message])[0]
+        best = int(np.argmax(scores))
+        if scores[best] >= self.threshold:
+            return self.keys[best], float(scores[best])
+        return None, 0.0
+
+    def find(self, user_message: str) -> str:
+        return self.match(user_message)[0]
+
+    def match_batch(self, messages: list) -> list:
+        """match() for many messages with one matrix product: [(scenario_key or None, similarity)]"""
+        if not self.keys or not messages:
+            return [(None, 0.0)] * len(messages)
+        scores = self.vectorizer.transform(messages) @ self.matrix.T
+        best = np.argmax(scores, axis=1)
+        best_scores = scores[np.arange(len(messages)), best]
+        return [(self.keys[b], float(score)) if score >= self.threshold else (None, 0.0)
+                for b, score in zip(best.tolist(), best_scores.tolist())]
+
+
+# ===== BUILD / LOAD =====
+def _scenario_prompts(scenario_responses: dict) -> dict:
+    """{coach: ([scenario keys], [user prompts])}"""
+    prompts = {}
+    for coach, scenarios in scenario_responses.items():
+        keys = [key for key, data in scenarios.items() if "user" in data]
+        prompts[coach] = (keys, [scenarios[key]["user"] for key in keys])
+    return prompts
+
+
+def _source_hash(prompts: dict) -> str:
+    return hashlib.sha256(json.dumps(prompts, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def build_index(scenario_responses: dict, path: str = DEFAULT_INDEX_PATH) -> str:
+    """Embed every coach's scenario prompts and save them as one compressed .npz"""
+    prompts = _scenario_prompts(scenario_responses)
+    all_texts = [text for _, texts in prompts.values() for text in texts]
+    vectorizer = HashedTfidfVectorizer().fit(all_texts)
+
+    arrays = {"idf": vectorizer.idf, "source_hash": np.array(_source_hash(prompts))}
+    for coach, (keys, texts) in prompts.items():
+        arrays[f"{coach}__keys"] = np.array(keys)
+        arrays[f"{coach}__matrix"] = vectorizer.transform(texts)
+    np.savez_compressed(path, **arrays)
+    return path
+
+
+def load_semantic_router(coach: str, scenario_responses: dict, path: str = DEFAULT_INDEX_PATH,
+                         threshold: float = SEMANTIC_MATCH_THRESHOLD):
+    """
+    Return a SemanticRouter for one coach, or None if NumPy is not installed.
+    Uses the saved matrix when it matches the current scenarios; otherwise
+    embeds them in memory (run this module to refresh the saved file).
+    """
+    if np is None:
+        return None
+
+    prompts = _scenario_prompts(scenario_responses)
+    keys, texts = prompts.get(coach, ([], []))
+    if os.path.exists(path):
+        with np.load(path) as saved:
+            if str(saved["source_hash"]) == _source_hash(prompts) and f"{coach}__matrix" in saved:
+                vectorizer = HashedTfidfVectorizer(idf=saved["idf"])
+                return SemanticRouter([str(k) for k in saved[f"{coach}__keys"]],
+                                      saved[f"{coach}__matrix"], vectorizer, threshold)
+
+    all_texts = [text for _, coach_texts in prompts.values() for text in coach_texts]
+    vectorizer = HashedTfidfVectorizer().fit(all_texts)
+    return SemanticRouter(keys, vectorizer.transform(texts), vectorizer, threshold)
+
+
+if __name__ == "__main__":
+    from conversation_database import SCENARIO_RESPONSES
+    print(f"Saved scenario embeddings to {build_index(SCENARIO_RESPONSES)}")
@@ -0,0 +1,122 @@
+"""
+Session Memory - Rolling background summarization of long coaching sessions
+Every N turns the oldest part of the context window is condensed into a compact summary
+"""
+
+import threading
+from rate_limiter import OPENAI_RATE_LIMITER, estimate_request_tokens
+from resilience import OPENAI_RESILIENCE
+
+SUMMARY_INSTRUCTIONS = """You maintain the memory of an ongoing coaching conversation.
+Merge the previous memory (if any) and the transcript excerpt into one compact summary of at most 120 words.
+Keep: the client's main concerns, feelings they named, goals, agreed next steps, and anything safety-relevant.
+Write in third person about "the client". No advice, no commentary."""
+
+# Summaries are generated off the request path on a small shared pool
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="session-memory")
+        return _executor
+
+
+class SessionSummarizer:
+    """
+    Schedules a summary every `every_n_turns` assistant replies.
+
+    The newest `keep_recent` messages stay verbatim; older unpinned messages
+    are summarized in the background together with the previous memory. The
+    finished summary is applied to the context window on the next request
+    (apply_pending), so the request thread never waits for it, and it stays
+    cached until the next roll-up replaces it.
+    """
+
+    def __init__(self, every_n_turns: int = 10, keep_recent: int = 6, max_tokens: int = 250):
+        self.every_n_turns = every_n_turns
+        self.keep_recent = keep_recent
+        self.max_tokens = max_tokens
+        self.turns = 0
+        self._generation = 0  # bumped on reset so stale results are discarded
+        self._in_flight = False
+        self._pending = None  # (generation, through_seq, summary)
+        self._lock = threading.Lock()
+
+    def note_turn(self, context, get_client, model: str):
+        """
+        Count an assistant reply and schedule a roll-up if one is due.
+        get_client() returns the OpenAI client; it is called by the background job.
+        """
+        self.turns += 1
+        if self.turns % self.every_n_turns or self._in_flight:
+            return
+
+        through_seq, older = context.summarizable(self.keep_recent)
+        if through_seq is None:
+            return
+
+        self._in_flight = True
+        _get_executor().submit(self._summarize, self._generation, through_seq,
+                               context.memory, older, get_client, model)
+
+    def _summarize(self, generation: int, through_seq: int, memory, older: list, get_client, model: str):
+        """Background job: one completion that folds `older` into the memory"""
+        transcript = "\n".join(f"{role}: {content}" for role, content in older)
+        previous = memory or "(none)"
+        messages = [
+            {"role": "system", "content": SUMMARY_INSTRUCTIONS},
+            {"role": "user", "content": f"Previous memory:\n{previous}\n\nTranscript excerpt:\n{transcript}"}
+        ]
+        try:
+            # Same per-attempt timeout, retries and circuit breaker as the coach's own calls
+            response, reservation = OPENAI_RESILIENCE.call(
+                lambda **params: self._create_completion(get_client(), **params),
+                model=model,
+                messages=messages,
+                temperature=0.2,
+                max_tokens=self.max_tokens
+            )
+            reservation.reconcile(response.usage)
+            summary = response.choices[0].message.content.strip()
+            with self._lock:
+                self._pending = (generation, through_seq, summary)
+        except Exception:
+            pass  # keep the current memory; the next roll-up will try again
+        finally:
+            self._in_flight = False
+
+    @staticmethod
+    def _create_completion(client, **params):
+        """
+        One attempt behind the rate limiter, as in BaseCoach._create_completion:
+        every retry is admitted, and a failed attempt gives its tokens back.
+        Summaries queue as their own "session" so they never crowd out live turns.
+        """
+        tokens = estimate_request_tokens(params["messages"], params.get("max_tokens"))
+        reservation = OPENAI_RATE_LIMITER.acquire("session-memory", tokens)
+        try:
+            response = client.chat.completions.create(**params)
+        except Exception:
+            reservation.release()
+            raise
+        return response, reservation
+
+    def apply_pending(self, context):
+        """Apply a finished summary to the context window (request thread)"""
+        with self._lock:
+            pending, self._pending = self._pending, None
+        if pending is not None and pending[0] == self._generation:
+            context.apply_summary(pending[1], pending[2])
+
+    def reset(self):
+        """Discard the memory schedule for a new session"""
+        with self._lock:
+            self._generation += 1
+            self._pending = None
+        self.turns = 0
@@ -0,0 +1,234 @@
+"""
+Session Store - Pluggable persistence for conversation history and session flags
+In-memory backend for single-process use; SQLite (WAL) backend shared by several app workers
+"""
+
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+import weakref
+
+from chat_message import ChatMessage
+
+
+class Session:
+    """
+    One conversation: `messages` (ChatMessage records) and `state` (coach flags).
+    Loaded lazily from the store on first access.
+    """
+
+    def __init__(self, store, session_id: str):
+        self.store = store
+        self.session_id = session_id
+        self._messages = None
+        self._state = None
+
+    def _load(self):
+        self._messages, self._state = self.store._load(self.session_id)
+
+    @property
+    def messages(self) -> list:
+        if self._messages is None:
+            self._load()
+        return self._messages
+
+    @property
+    def state(self) -> dict:
+        if self._state is None:
+            self._load()
+        return self._state
+
+    def append(self, message: ChatMessage):
+        """Append one history message (persisted append-only)"""
+        self.messages.append(message)
+        self.store._append(self.session_id, message)
+
+    def update_state(self, durable: bool = False, **fields):
+        """Update session flags; durable=True writes through immediately"""
+        self.state.update(fields)
+        self.store._save_state(self.session_id, self.state, durable)
+
+    def clear(self):
+        """Drop history and flags (new conversation under the same id)"""
+        self.store._clear(self.session_id)
+        self.messages.clear()
+        self.state.clear()
+
+
+class InMemorySessionStore:
+    """Process-local store; sessions live as long as the store object"""
+
+    def __init__(self):
+        self._sessions = {}
+
+    def open(self, session_id: str) -> Session:
+        return Session(self, session_id)
+
+    def _load(self, session_id: str) -> tuple:
+        return self._sessions.setdefault(session_id, ([], {}))
+
+    def _append(self, session_id: str, message: ChatMessage):
+        pass  # Session.messages is the stored list itself
+
+    def _save_state(self, session_id: str, state: dict, durable: bool):
+        pass  # Session.state is the stored dict itself
+
+    def _clear(self, session_id: str):
+        pass  # Session.clear empties the stored list and dict in place
+
+    def flush(self):
+        pass
+
+
+class SqliteSessionStore:
+    """
+    SQLite store in WAL mode so several processes can share one database file.
+
+    Messages are append-only rows; writes are buffered and committed in one
+    transaction per batch by a writer thread (once batch_size operations are
+    queued or flush_interval seconds have passed, whichever comes first).
+    Durable state updates and interpreter exit commit synchronously. Reads
+    and commits share one connection and take turns under the same lock.
+    """
+
+    def __init__(self, path: str, batch_size: int = 32, flush_interval: float = 1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS session_messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                timestamp TEXT NOT NULL,
+                pinned INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS session_messages_session ON session_messages (session_id, id);
+            CREATE TABLE IF NOT EXISTS session_state (
+                session_id TEXT PRIMARY KEY,
+                state TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            );
+        """)
+        self._lock = threading.Lock()
+        self._pending = []  # (sql, params) in write order
+        self._last_flush = time.monotonic()
+        self._closed = False
+
+        # Batches are committed by the writer thread; _wake starts one early when a batch is full
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="session-store-flush", daemon=True)
+        self._flusher.start()
+        atexit.register(_flush_at_exit, weakref.ref(self))
+
+    def open(self, session_id: str) -> Session:
+        return Session(self, session_id)
+
+    # ===== READS =====
+    def _load(self, session_id: str) -> tuple:
+        self.flush()  # read-your-writes within this process
+        with self._lock:  # never interleave with a commit on the shared connection
+            rows = self._conn.execute(
+                "SELECT role, content, timestamp, pinned FROM session_messages WHERE session_id = ? ORDER BY id",
+                (session_id,)).fetchall()
+            row = self._conn.execute(
+                "SELECT state FROM session_state WHERE session_id = ?", (session_id,)).fetchone()
+        messages = [ChatMessage.from_dict({"role": role, "content": content, "timestamp": timestamp, "pinned": pinned})
+                    for role, content, timestamp, pinned in rows]
+        return messages, (json.loads(row[0]) if row else {})
+
+    # ===== BUFFERED WRITES =====
+    def _queue(self, sql: str, params: tuple, force: bool = False):
+        with self._lock:
+            self._pending.append((sql, params))
+            due = (len(self._pending) >= self.batch_size
+                   or time.monotonic() - self._last_flush >= self.flush_interval)
+        if force:
+            self.flush()  # durable: committed before returning
+        elif due:
+            self._wake.set()  # committed by the writer thread, off the request path
+
+    def _append(self, session_id: str, message: ChatMessage):
+        self._queue(
+            "INSERT INTO session_messages (session_id, role, content, timestamp, pinned) VALUES (?, ?, ?, ?, ?)",
+            (session_id, message.role, message.content, message.timestamp, int(message.pinned)))
+
+    def _save_state(self, session_id: str, state: dict, durable: bool):
+        self._queue(
+            "INSERT OR REPLACE INTO session_state (session_id, state, updated_at) VALUES (?, ?, ?)",
+            (session_id, json.dumps(state), time.time()), force=durable)
+
+    def _clear(self, session_id: str):
+        self._queue("DELETE FROM session_messages WHERE session_id = ?", (session_id,))
+        self._queue("DELETE FROM session_state WHERE session_id = ?", (session_id,), force=True)
+
+    def flush(self):
+        """Commit all buffered writes in one transaction"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._last_flush = time.monotonic()
+            if not pending or self._closed:
+                return
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for sql, params in pending:
+                    self._conn.execute(sql, params)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                self._pending = pending + self._pending
+                raise
+
+    def _flush_loop(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except sqlite3.Error:
+                pass  # retried on the next tick
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        self.flush()
+        with self._lock:
+            self._closed = True
+            self._conn.close()
+
+
+def _flush_at_exit(store_ref):
+    store = store_ref()
+    if store is not None and not store._closed:
+        store.flush()
+
+
+def state_property(name: str, default=None, durable: bool = False):
+    """
+    Coach attribute stored in the session state instead of on the instance,
+    so it is persisted and restored with the conversation.
+    """
+    def getter(self):
+        return self.session.state.get(name, default)
+
+    def setter(self, value):
+        self.session.update_state(durable=durable, **{name: value})
+
+    return property(getter, setter)
+
+
+def create_session_store():
+    """
+    Store configured by the environment: SqliteSessionStore at SESSION_DB_PATH
+    when set, otherwise None (each coach keeps an in-memory store).
+    """
+    path = os.getenv("SESSION_DB_PATH")
+    return SqliteSessionStore(path) if path else None
@@ -0,0 +1,108 @@
+"""
+Speculative Routing - Safety scan and scenario match computed while the user is still typing
+Each partial input only rescans the tail that can still change; on submit the coach
+reuses whatever the last partial input already settled
+"""
+
+import threading
+
+from safety_engine import SafetyScan, SafetyMatch
+
+
+class IncrementalSafetyScan:
+    """
+    SafetyEngine.scan() over text that grows at the end.
+
+    A lexicon match starting at offset p depends only on the characters
+    p .. p + longest phrase, so matches that start that far before the end of
+    the text can no longer change when more text is typed. Only the last
+    longest-phrase characters are rescanned per update; an edit anywhere else
+    (backspace, paste, cursor moves) restarts the scan from the beginning.
+    The result is always identical to engine.scan(text).
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.window = max((len(p) for phrases in engine.lexicon.values() for p in phrases), default=0)
+        self.text_lower = ""
+        self.stable_matches = []  # matches starting before stable_end: final
+        self.stable_end = 0
+        self.scan = SafetyScan('green', [])
+
+    def update(self, text: str) -> SafetyScan:
+        """Advance to `text` and return its scan"""
+        text_lower = text.lower()
+        if text_lower == self.text_lower:
+            return self.scan
+        if not text_lower.startswith(self.text_lower):
+            self.stable_matches, self.stable_end = [], 0
+        self.text_lower = text_lower
+        if self.engine.pattern is None:
+            self.scan = SafetyScan('green', [])
+            return self.scan
+
+        stable_end = max(len(text_lower) - self.window + 1, self.stable_end)
+        tail = []
+        for m in self.engine.pattern.finditer(text_lower, self.stable_end):
+            zone = m.lastgroup
+            start, end = m.span(zone)
+            match = SafetyMatch(m.group(zone), zone, start, end)
+            (self.stable_matches if start < stable_end else tail).append(match)
+        self.stable_end = stable_end
+
+        matches = self.stable_matches + tail
+        found_zones = {match.zone for match in matches}
+        zone = next((z for z in self.engine.zones if z in found_zones), 'green')
+        self.scan = SafetyScan(zone, matches)
+        return self.scan
+
+
+class SpeculativeRouter:
+    """
+    Warm routing state for one coach while its user types.
+
+    update(partial_text) advances the incremental safety scan and, for green
+    text, runs the coach's scenario lookup on the partial input. On submit the
+    coach asks safety_scan()/scenario_match() for the final message: when it
+    is the text last seen here, the stored result is returned (no rescan);
+    a longer text only scans its tail. Results are never used for a
+    different message. Thread-safe: typing updates may arrive from another
+    request thread than the one handling the submit.
+    """
+
+    def __init__(self, engine, find_scenario):
+        self.find_scenario = find_scenario
+        self._scan = IncrementalSafetyScan(engine)
+        self._scenario_text = None
+        self._scenario_key = None
+        self._lock = threading.Lock()
+
+    def update(self, partial_text: str):
+        """Precompute for the text typed so far; returns its safety zone"""
+        with self._lock:
+            scan = self._scan.update(partial_text)
+        if scan.zone == 'green' and partial_text.strip():
+            # The scenario lookup is only needed when safety lets the message through
+            scenario_key = self.find_scenario(partial_text)
+            with self._lock:
+                if self._scan.text_lower == partial_text.lower():
+                    self._scenario_text, self._scenario_key = partial_text, scenario_key
+        return scan.zone
+
+    def safety_scan(self, message: str) -> SafetyScan:
+        """Scan of the submitted message, reusing the prefix scanned while typing"""
+        with self._lock:
+            return self._scan.update(message)
+
+    def scenario_match(self, message: str) -> tuple:
+        """(True, scenario_key) if `message` was looked up while typing, else (False, None)"""
+        with self._lock:
+            if message == self._scenario_text:
+                return True, self._scenario_key
+            return False, None
+
+    def reset(self):
+        """Forget the typed text (after a submit)"""
+        with self._lock:
+            self._scan = IncrementalSafetyScan(self._scan.engine)
+            self._scenario_text = self._scenario_key = None
@@ -8,13 +8,11 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
-import time
+import uuid
 import streamlit as st
-from Anne_Rosental import AnneRosental
-from Hiro_Lin import HiroLin
-from Anne_Rosental_prompt import ANNE_SYSTEM_PROMPT
-from Hiro_Lin_prompt import HIRO_SYSTEM_PROMPT
-from conversation_database import CONVERSATION_STARTERS, SCENARIO_RESPONSES
+from session_store import create_session_store
+from delivery_scheduler import DeliveryScheduler
+from openai_clients import preconnect
 
 # ===== PAGE CONFIGURATION =====
 st.set_page_config(
@@ -23,14 +21,20 @@ st.set_page_config(
     layout="wide"
 )
 
+# ===== SESSION STORE =====
+@st.cache_resource
+def get_session_store():
+    """Shared SQLite session store when SESSION_DB_PATH is set, otherwise None (in-memory)"""
+    return create_session_store()
+
 # ===== SESSION STATE INITIALIZATION =====
-# Initialize Anne Rosental
-if 'anne' not in st.session_state:
-    st.session_state.anne = AnneRosental(ANNE_SYSTEM_PROMPT, SCENARIO_RESPONSES)
+# Session id travels in the URL (?sid=...) so a persisted session can be
+# resumed after a restart or by another app worker
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = st.query_params.get("sid") or uuid.uuid4().hex
+    st.query_params["sid"] = st.session_state.session_id
 
-# Initialize Hiro Lin
-if 'hiro' not in st.session_state:
-    st.session_state.hiro = HiroLin(HIRO_SYSTEM_PROMPT, SCENARIO_RESPONSES)
+# Coach instances (st.session_state.anne / .hiro) are created on first selection, see get_current_coach
 
 # Initialize current coach
 if 'current_coach' not in st.session_state:
@@ -40,6 +44,10 @@ if 'current_coach' not in st.session_state:
 if 'messages' not in st.session_state:
     st.session_state.messages = []
 
+# Initialize timed follow-up messages (red zone sequence)
+if 'scheduled_messages' not in st.session_state:
+    st.session_state.scheduled_messages = DeliveryScheduler()
+
 
 
 # ===== COACH INFORMATION =====
@@ -67,47 +75,64 @@ COACH_INFO = {
 }
 
 # ===== HELPER FUNCTIONS =====
-def get_coach_response(user_input: str) -> str:
-    """Get response from current coach"""
+def get_current_coach():
+    """Coach instance for the current selection (created on first use), or None"""
     coach_key = st.session_state.current_coach
-    
-    if coach_key == 'anne':
-        return st.session_state.anne.get_response(user_input)
-    elif coach_key == 'hiro':
-        return st.session_state.hiro.get_response(user_input)
-    else:
+    if not coach_key:
+        return None
+    if coach_key not in st.session_state:
+        # Imported here so the coach selection page renders without loading the engine
+        from content_store import get_content_store
+        if coach_key == 'anne':
+            from Anne_Rosental import AnneRosental as coach_class
+        else:
+            from Hiro_Lin import HiroLin as coach_class
+        st.session_state[coach_key] = coach_class(coach_class.persona.system_prompt, get_content_store(),
+                                                  session_store=get_session_store(),
+                                                  session_id=f"{st.session_state.session_id}-{coach_key}")
+    return st.session_state[coach_key]
+
+def get_coach_response(user_input: str):
+    """
+    Get response from current coach.
+    Returns a dict (red zone), a string (amber zone / database), or a generator
+    of text deltas for creative responses.
+    """
+    coach = get_current_coach()
+    if coach is None:
         return "Please select a coach first."
+    return coach.stream_response(user_input)
 
 def clear_conversation():
     """Clear conversation history for current coach"""
-    if st.session_state.current_coach:
-        coach_key = st.session_state.current_coach
-        if coach_key == 'anne':
-            st.session_state.anne.reset_conversation()
-        elif coach_key == 'hiro':
-            st.session_state.hiro.reset_conversation()
-        
+    coach = get_current_coach()
+    if coach is not None:
+        coach.reset_conversation()
         st.session_state.messages = []
+        st.session_state.scheduled_messages.clear()
 
 def get_conversation_history():
     """Get conversation history from current coach"""
-    if st.session_state.current_coach:
-        coach_key = st.session_state.current_coach
-        if coach_key == 'anne':
-            return st.session_state.anne.get_conversation_history()
-        elif coach_key == 'hiro':
-            return st.session_state.hiro.get_conversation_history()
-    return []
+    coach = get_current_coach()
+    return coach.get_conversation_history() if coach is not None else []
 
 def is_session_terminated():
     """Check if session has been terminated due to RED ZONE"""
-    if st.session_state.current_coach:
-        coach_key = st.session_state.current_coach
-        if coach_key == 'anne':
-            return st.session_state.anne.is_session_terminated()
-        elif coach_key == 'hiro':
-            return st.session_state.hiro.is_session_terminated()
-    return False
+    coach = get_current_coach()
+    return coach.is_session_terminated() if coach is not None else False
+
+@st.fragment(run_every=1)
+def deliver_scheduled_messages():
+    """
+    Poll once per second for due follow-up messages and show them.
+    Runs as an auto-refreshing fragment, so the script thread never sleeps.
+    """
+    due_messages = st.session_state.scheduled_messages.pop_due()
+    if due_messages:
+        st.session_state.messages.extend(
+            {"role": msg.role, "content": msg.content} for msg in due_messages
+        )
+        st.rerun()
 
 def show_conversation_starters():
     """Display conversation starters for current coach"""
@@ -116,7 +141,8 @@ def show_conversation_starters():
         return
     
     coach_key = st.session_state.current_coach
-    starters = CONVERSATION_STARTERS.get(coach_key, {})
+    from content_store import get_content_store
+    starters = get_content_store().conversation_starters.get(coach_key, {})
     
     st.markdown("### 💬 Conversation Starters")
     st.markdown("These are example opening messages from your coach:")
@@ -144,7 +170,8 @@ def show_scenario_responses():
         return
     
     coach_key = st.session_state.current_coach
-    scenarios = SCENARIO_RESPONSES.get(coach_key, {})
+    from content_store import get_content_store
+    scenarios = get_content_store().scenarios_for(coach_key)
     coach_info = COACH_INFO[coach_key]
     
     st.markdown("### 📝 Standard Scenarios")
@@ -224,6 +251,7 @@ else:
         if st.button("🔄 Switch Coach", use_container_width=True):
             st.session_state.current_coach = None
             st.session_state.messages = []
+            st.session_state.scheduled_messages.clear()
             st.rerun()
         
         # Clear conversation button
@@ -256,17 +284,31 @@ else:
     # ===== CHAT INTERFACE =====
     st.markdown("### 💬 Chat Session")
     
+    # Resumed persistent session - show the stored conversation
+    if not st.session_state.messages and get_session_store() is not None:
+        st.session_state.messages = [
+            {"role": msg["role"], "content": msg["content"]} for msg in get_conversation_history()
+        ]
+    
     # Display chat messages
     for message in st.session_state.messages:
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
     
+    # Deliver pending follow-up messages as they come due
+    if st.session_state.scheduled_messages.has_pending():
+        deliver_scheduled_messages()
+    
     # Chat input - Check if session is terminated
     if is_session_terminated():
         # Session terminated due to RED ZONE - show clear termination message as ONE single warning
         st.error("🚨 **This conversation has been ended for your safety. Please reach out to professional support immediately. Your well-being is the priority.**")
         st.info("Use the '🗑️ Clear Conversation' button in the sidebar to start a new session if needed.")
     else:
+        # Warm an API connection while the user types (st.chat_input reports only the submit,
+        # so partial-input precomputation via coach.prepare() needs a typing-aware frontend)
+        preconnect()
+
         # Normal chat input
         if user_input := st.chat_input("Type your message here..."):
             # Add user message to chat
@@ -280,34 +322,27 @@ else:
             
             # Check if this is a red zone response (dict with timed messages)
             if isinstance(response, dict) and response.get("type") == "red":
-                # RED ZONE - Deliver messages with 5-second delays
+                # RED ZONE - Initial message now, follow-ups scheduled 5 and 10 seconds later
                 
                 # Message 1: Initial crisis response (immediate)
                 with st.chat_message("assistant"):
                     st.markdown(response["initial"])
                 st.session_state.messages.append({"role": "assistant", "content": response["initial"]})
                 
-                # Wait 5 seconds then show care message
-                time.sleep(5)
-                
-                # Message 2: Care message
-                with st.chat_message("assistant"):
-                    st.markdown(response["care_message"])
-                st.session_state.messages.append({"role": "assistant", "content": response["care_message"]})
-                
-                # Wait 5 seconds then show stop message
-                time.sleep(5)
+                # Messages 2 and 3: Care message and stop message (delivered by deliver_scheduled_messages)
+                st.session_state.scheduled_messages.schedule_red_zone(response)
                 
-                # Message 3: Stop message
-                with st.chat_message("assistant"):
-                    st.markdown(response["stop_message"])
-                st.session_state.messages.append({"role": "assistant", "content": response["stop_message"]})
-                
-            else:
-                # Normal response (string) - amber zone or regular
+            elif isinstance(response, str):
+                # Normal response (string) - amber zone or database
                 with st.chat_message("assistant"):
                     st.markdown(response)
                 st.session_state.messages.append({"role": "assistant", "content": response})
+
+            else:
+                # Creative response - render deltas as they arrive
+                with st.chat_message("assistant"):
+                    full_response = st.write_stream(response)
+                st.session_state.messages.append({"role": "assistant", "content": full_response})
             
             st.rerun()
 
@@ -0,0 +1,11 @@
+"""
+Shared test setup: modules are imported from the repository root (flat layout)
+Run from the repository root:  python -m pytest -q
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
@@ -0,0 +1,47 @@
+"""
+BaseCoach routing against persisted sessions
+"""
+
+from coach_engine import create_coach
+from conversation_database import SCENARIO_RESPONSES
+from response_cache import MemoryResponseCache, response_cache_key
+from session_store import SqliteSessionStore
+
+CREATIVE_MESSAGE = "Tell me something about planning a calmer week."
+
+
+class RecordingClient:
+    """Stands in for the OpenAI client; records that a completion was requested"""
+
+    def __init__(self):
+        self.calls = 0
+        self.chat = self
+        self.completions = self
+
+    def create(self, **params):
+        self.calls += 1
+        raise ConnectionError("no upstream in tests")
+
+
+def test_resumed_session_is_not_served_a_first_turn_cached_reply(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    store = SqliteSessionStore(path)
+    first = create_coach("hiro", SCENARIO_RESPONSES, session_store=store, session_id="resume-hiro")
+    for _ in range(3):
+        first.add_message("user", "I keep postponing the important tasks.")
+        first.add_message("assistant", "What is the smallest next step?")
+    store.close()
+
+    cache = MemoryResponseCache()
+    store = SqliteSessionStore(path)
+    resumed = create_coach("hiro", SCENARIO_RESPONSES, session_store=store, session_id="resume-hiro",
+                           response_cache=cache)
+    cache.set(response_cache_key("hiro", CREATIVE_MESSAGE, resumed.prompt_version), "CACHED FIRST-TURN REPLY")
+    resumed.client = RecordingClient()
+
+    response = resumed.get_response(CREATIVE_MESSAGE)
+    store.close()
+
+    assert response != "CACHED FIRST-TURN REPLY"
+    assert cache.stats()["hits"] == 0
+    assert len(resumed.get_conversation_history()) == 8
@@ -0,0 +1,76 @@
+"""
+Coach server end to end: a real server process with one worker, driven over HTTP
+"""
+
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+from conftest import ROOT
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture(scope="module")
+def server():
+    port = _free_port()
+    env = {key: value for key, value in os.environ.items()
+           if key not in ("OPENAI_API_KEY", "SESSION_DB_PATH", "CONTENT_DB_PATH")}
+    proc = subprocess.Popen([sys.executable, "coach_server.py", "--port", str(port), "--workers", "1"],
+                            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            if request(port, "GET", "/healthz")[0] == 200:
+                break
+        except OSError:
+            if time.monotonic() > deadline or proc.poll() is not None:
+                proc.kill()
+                pytest.fail("coach server did not start")
+            time.sleep(0.2)
+    yield port
+    proc.terminate()
+    proc.wait(timeout=15)
+
+
+def request(port: int, method: str, path: str, body: dict = None) -> tuple:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    try:
+        conn.request(method, path, json.dumps(body) if body is not None else None)
+        response = conn.getresponse()
+        return response.status, json.loads(response.read() or b"null")
+    finally:
+        conn.close()
+
+
+def test_red_zone_ends_coaching_for_the_session(server):
+    from coach_personas import ANNE_PERSONA
+
+    status, red = request(server, "POST", "/v1/chat", {"coach": "anne", "message": "I want to die"})
+    assert status == 200
+    assert red["route"] == "red" and red["terminated"]
+
+    status, after = request(server, "POST", "/v1/chat", {
+        "coach": "anne", "session_id": red["session_id"],
+        "message": "I feel completely overwhelmed lately and don't know where to start."})
+    assert status == 200
+    assert after["route"] == "terminated"
+    assert after["response"] == ANNE_PERSONA.termination_warning
+    assert after["terminated"]
+
+
+def test_other_sessions_keep_coaching(server):
+    status, reply = request(server, "POST", "/v1/chat", {
+        "coach": "anne", "message": "I feel completely overwhelmed lately and don't know where to start."})
+    assert status == 200
+    assert reply["route"] == "scenario" and not reply["terminated"]
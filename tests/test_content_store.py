@@ -0,0 +1,17 @@
+"""
+Content file round trip
+"""
+
+from content_store import read_content_db, write_content_db
+from conversation_database import CONVERSATION_STARTERS, SCENARIO_RESPONSES
+
+
+def test_content_file_keeps_the_original_order(tmp_path):
+    path = write_content_db(str(tmp_path / "content.db"), CONVERSATION_STARTERS, SCENARIO_RESPONSES)
+
+    starters, scenarios = read_content_db(path)
+
+    for coach, categories in CONVERSATION_STARTERS.items():
+        assert list(starters[coach].items()) == list(categories.items())
+    for coach, coach_scenarios in SCENARIO_RESPONSES.items():
+        assert list(scenarios[coach]) == list(coach_scenarios)
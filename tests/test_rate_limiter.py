@@ -0,0 +1,30 @@
+"""
+RateLimiter admission queue
+"""
+
+import asyncio
+
+from rate_limiter import RateLimiter
+
+
+def test_cancelled_async_waiter_leaves_the_queue():
+    limiter = RateLimiter(rpm=60, tpm=0, max_wait=3, burst_seconds=1)  # one request per second
+
+    async def scenario():
+        limiter.acquire("a", 10)  # uses up the capacity
+        waiter = asyncio.create_task(limiter.acquire_async("a", 10))
+        await asyncio.sleep(0.1)
+        assert limiter.stats()["waiting"] == 1
+        waiter.cancel()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            pass
+        assert limiter.stats()["waiting"] == 0
+        # The next session is admitted once capacity refills instead of queueing behind the cancelled ticket
+        return await limiter.acquire_async("b", 10)
+
+    reservation = asyncio.run(scenario())
+    assert reservation.limiter is limiter
+    assert limiter.stats()["timed_out"] == 0
+    assert limiter.stats()["waiting"] == 0
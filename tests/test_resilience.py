@@ -0,0 +1,56 @@
+"""
+ResilientCaller outcomes as seen by the circuit breaker
+"""
+
+import pytest
+
+from coach_engine import create_coach
+from conversation_database import SCENARIO_RESPONSES
+from resilience import CircuitBreaker, DeadlineExceeded, ResilientCaller, RetryPolicy
+
+
+class BrokenStreamClient:
+    """Opens a stream that yields one delta and then loses the connection"""
+
+    def __init__(self):
+        self.chat = self
+        self.completions = self
+
+    def create(self, **params):
+        return self._chunks()
+
+    def _chunks(self):
+        class Delta:
+            content = "Let's "
+
+        class Choice:
+            delta = Delta()
+
+        class Chunk:
+            usage = None
+            choices = [Choice()]
+
+        yield Chunk()
+        raise ConnectionError("stream reset by peer")
+
+
+def test_call_without_any_attempt_raises_deadline_exceeded():
+    caller = ResilientCaller(RetryPolicy(total_budget=0))
+
+    with pytest.raises(DeadlineExceeded):
+        caller.call(lambda **params: "never called")
+    assert caller.stats()["attempts"] == 0
+
+
+def test_stream_broken_while_read_counts_as_breaker_failure():
+    caller = ResilientCaller(breaker=CircuitBreaker(window=2, min_calls=2))
+    coach = create_coach("hiro", SCENARIO_RESPONSES)
+    coach.resilience = caller
+    coach.client = BrokenStreamClient()
+
+    reply = "".join(coach.stream_creative_response("Tell me something about planning a calmer week."))
+
+    assert reply == "Let's "  # what reached the user is kept
+    stats = caller.stats()
+    assert stats["successes"] == 1 and stats["failures"] == 1
+    assert stats["state"] == "open"  # one success and one failure in a window of two
@@ -0,0 +1,52 @@
+"""
+SessionSummarizer background roll-ups
+"""
+
+import httpx
+import openai
+
+import session_memory
+from rate_limiter import RateLimiter
+from resilience import ResilientCaller, RetryPolicy
+
+
+class FlakyClient:
+    """Loses the connection on the first `failures` requests, then returns a summary"""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.chat = self
+        self.completions = self
+
+    def create(self, **params):
+        if self.failures:
+            self.failures -= 1
+            raise openai.APIConnectionError(request=httpx.Request("POST", "https://api.openai.com/v1"))
+
+        class Usage:
+            total_tokens = 40
+
+        class Message:
+            content = " The client wants a calmer week. "
+
+        class Choice:
+            message = Message()
+
+        class Response:
+            usage = Usage()
+            choices = [Choice()]
+
+        return Response()
+
+
+def test_every_summary_attempt_is_admitted_by_the_rate_limiter(monkeypatch):
+    limiter = RateLimiter(rpm=600, tpm=100000)
+    monkeypatch.setattr(session_memory, "OPENAI_RATE_LIMITER", limiter)
+    monkeypatch.setattr(session_memory, "OPENAI_RESILIENCE", ResilientCaller(RetryPolicy(base_delay=0.01)))
+    summarizer = session_memory.SessionSummarizer()
+    client = FlakyClient(failures=2)
+
+    summarizer._summarize(0, 4, None, [("user", "I need a calmer week.")], lambda: client, "gpt-4o-mini")
+
+    assert summarizer._pending == (0, 4, "The client wants a calmer week.")
+    assert limiter.stats()["admitted"] == 3
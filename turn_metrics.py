@@ -0,0 +1,282 @@
+"""
+Turn Metrics - Per-stage latency histograms and token counts for coach turns
+HDR-style log-linear histograms, exported as Prometheus text and/or JSON lines
+Disabled by default (COACH_METRICS=1, COACH_METRICS_JSONL=<path> or COACH_METRICS_PROM=<path> to enable);
+while disabled coaches do no bookkeeping beyond a few perf_counter() calls
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+
+# Histogram resolution: 2**SUB_BUCKET_BITS linear sub-buckets per power of two (~1% error)
+SUB_BUCKET_BITS = 7
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+SUB_BUCKET_HALF = SUB_BUCKET_COUNT >> 1
+
+# Recorded unit: microseconds
+UNIT = 1e-6
+
+# `le` bounds (seconds) of the exported Prometheus histograms
+PROMETHEUS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+EXPORTED_QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _bucket_index(value: int) -> int:
+    """Log-linear bucket of a non-negative integer value"""
+    if value < SUB_BUCKET_COUNT:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    return SUB_BUCKET_COUNT + (shift - 1) * SUB_BUCKET_HALF + (value >> shift) - SUB_BUCKET_HALF
+
+
+def _bucket_upper(index: int) -> int:
+    """Highest value that falls into bucket `index`"""
+    if index < SUB_BUCKET_COUNT:
+        return index
+    shift = (index - SUB_BUCKET_COUNT) // SUB_BUCKET_HALF + 1
+    mantissa = (index - SUB_BUCKET_COUNT) % SUB_BUCKET_HALF + SUB_BUCKET_HALF
+    return ((mantissa + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """
+    HDR-style histogram of durations: constant relative precision from
+    microseconds to minutes in a few hundred sparse buckets, so recording is
+    O(1) and percentiles need no stored samples.
+    """
+
+    def __init__(self):
+        self.counts = {}  # bucket index -> count
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def record(self, seconds: float):
+        index = _bucket_index(max(int(seconds / UNIT), 0))
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other: "LatencyHistogram"):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.count:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def percentile(self, q: float) -> float:
+        """Value (seconds) at quantile q (0..1); 0.0 when empty"""
+        if not self.count:
+            return 0.0
+        rank = max(1, round(q * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(_bucket_upper(index) * UNIT, self.max)
+        return self.max
+
+    def cumulative_counts(self, bounds: tuple) -> list:
+        """Number of values <= each bound (for Prometheus `le` buckets)"""
+        result = []
+        indexes = sorted(self.counts)
+        seen = 0
+        position = 0
+        for bound in bounds:
+            while position < len(indexes) and _bucket_upper(indexes[position]) * UNIT <= bound:
+                seen += self.counts[indexes[position]]
+                position += 1
+            result.append(seen)
+        return result
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "min": self.min or 0.0,
+            "max": self.max or 0.0,
+            **{f"p{int(q * 100)}": self.percentile(q) for q in EXPORTED_QUANTILES}
+        }
+
+
+class JsonlTurnExporter:
+    """Appends one JSON object per turn to a file (opened lazily, line-buffered)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._lock = threading.Lock()
+
+    def export(self, event: dict):
+        line = json.dumps(event, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8", buffering=1)
+            self._file.write(line)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def _usage_tokens(usage) -> dict:
+    """Token counts from a completion `usage` object (empty if missing)"""
+    if usage is None:
+        return {}
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "prompt": usage.prompt_tokens or 0,
+        "completion": usage.completion_tokens or 0,
+        "cached": (getattr(details, "cached_tokens", None) or 0) if details else 0
+    }
+
+
+def _labels(**labels) -> str:
+    return ",".join(f'{key}="{value}"' for key, value in labels.items())
+
+
+class TurnMetrics:
+    """
+    Process-wide registry: one histogram per (coach, route, stage), turn
+    counters per (coach, route) and token counters per (coach, kind).
+
+    Coaches call record_turn() at the end of every turn when `enabled` is set;
+    each exporter (e.g. JsonlTurnExporter) additionally receives the raw turn.
+    """
+
+    def __init__(self, enabled: bool = False, exporters: list = None):
+        self.enabled = enabled
+        self.exporters = list(exporters or [])
+        self.collectors = []  # extra callables returning Prometheus text (e.g. resilience.py)
+        self._histograms = {}
+        self._turns = {}
+        self._tokens = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "TurnMetrics":
+        jsonl_path = os.getenv("COACH_METRICS_JSONL")
+        exporters = [JsonlTurnExporter(jsonl_path)] if jsonl_path else []
+        enabled = bool(exporters or os.getenv("COACH_METRICS_PROM")) or os.getenv("COACH_METRICS", "") not in ("", "0")
+        return cls(enabled=enabled, exporters=exporters)
+
+    def enable(self, jsonl_path: str = None):
+        """Start recording (optionally also writing JSON lines to jsonl_path)"""
+        if jsonl_path:
+            self.exporters.append(JsonlTurnExporter(jsonl_path))
+        self.enabled = True
+
+    def add_collector(self, collector):
+        """Append collector() output to prometheus_text()"""
+        self.collectors.append(collector)
+
+    def disable(self):
+        self.enabled = False
+
+    def record_turn(self, coach: str, route: str, timings: dict, usage=None, session_id: str = None):
+        """Record one finished turn: stage timings (seconds by stage name) and token usage"""
+        tokens = _usage_tokens(usage)
+        with self._lock:
+            for stage, seconds in timings.items():
+                key = (coach, route, stage)
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = LatencyHistogram()
+                histogram.record(seconds)
+            self._turns[(coach, route)] = self._turns.get((coach, route), 0) + 1
+            for kind, count in tokens.items():
+                self._tokens[(coach, kind)] = self._tokens.get((coach, kind), 0) + count
+
+        if self.exporters:
+            event = {"ts": time.time(), "coach": coach, "session_id": session_id, "route": route,
+                     "timings": timings, "tokens": tokens}
+            for exporter in self.exporters:
+                exporter.export(event)
+
+    def histogram(self, coach: str = None, route: str = None, stage: str = "turn") -> LatencyHistogram:
+        """Merged histogram of `stage` over every coach/route matching the (optional) filters"""
+        merged = LatencyHistogram()
+        with self._lock:
+            for (h_coach, h_route, h_stage), histogram in self._histograms.items():
+                if h_stage == stage and coach in (None, h_coach) and route in (None, h_route):
+                    merged.merge(histogram)
+        return merged
+
+    def snapshot(self) -> dict:
+        """Summaries (count/mean/min/max/p50/p95/p99) keyed by 'coach/route/stage', plus counters"""
+        with self._lock:
+            return {
+                "latency": {"/".join(key): histogram.summary()
+                            for key, histogram in sorted(self._histograms.items())},
+                "turns": {"/".join(key): count for key, count in sorted(self._turns.items())},
+                "tokens": {"/".join(key): count for key, count in sorted(self._tokens.items())}
+            }
+
+    def prometheus_text(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = [
+            "# HELP coach_stage_latency_seconds Duration of each routing stage per turn.",
+            "# TYPE coach_stage_latency_seconds histogram"
+        ]
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            turns = sorted(self._turns.items())
+            tokens = sorted(self._tokens.items())
+
+        for (coach, route, stage), histogram in histograms:
+            labels = _labels(coach=coach, route=route, stage=stage)
+            for bound, count in zip(PROMETHEUS_BUCKETS, histogram.cumulative_counts(PROMETHEUS_BUCKETS)):
+                lines.append(f'coach_stage_latency_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'coach_stage_latency_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f"coach_stage_latency_seconds_sum{{{labels}}} {histogram.total:.6f}")
+            lines.append(f"coach_stage_latency_seconds_count{{{labels}}} {histogram.count}")
+
+        lines += [
+            "# HELP coach_stage_latency_quantile_seconds Stage latency quantiles from the HDR histograms.",
+            "# TYPE coach_stage_latency_quantile_seconds gauge"
+        ]
+        for (coach, route, stage), histogram in histograms:
+            for q in EXPORTED_QUANTILES:
+                labels = _labels(coach=coach, route=route, stage=stage, quantile=q)
+                lines.append(f"coach_stage_latency_quantile_seconds{{{labels}}} {histogram.percentile(q):.6f}")
+
+        lines += ["# HELP coach_turns_total Turns answered, by route.", "# TYPE coach_turns_total counter"]
+        lines += [f"coach_turns_total{{{_labels(coach=coach, route=route)}}} {count}"
+                  for (coach, route), count in turns]
+
+        lines += ["# HELP coach_tokens_total OpenAI tokens used, by kind.", "# TYPE coach_tokens_total counter"]
+        lines += [f"coach_tokens_total{{{_labels(coach=coach, kind=kind)}}} {count}"
+                  for (coach, kind), count in tokens]
+        return "\n".join(lines) + "\n" + "".join(collector() for collector in self.collectors)
+
+    def write_prometheus_textfile(self, path: str):
+        """Write prometheus_text() atomically (node_exporter textfile collector format)"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._turns.clear()
+            self._tokens.clear()
+
+
+# Shared by every coach instance in this process
+TURN_METRICS = TurnMetrics.from_env()
+
+if os.getenv("COACH_METRICS_PROM"):
+    atexit.register(TURN_METRICS.write_prometheus_textfile, os.getenv("COACH_METRICS_PROM"))